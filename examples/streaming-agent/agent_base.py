@@ -15,12 +15,42 @@ import json
 import time
 import random
 import re
+import asyncio
+import atexit
+import queue
+import threading
 import subprocess
 import platform
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from typing import Optional
+from urllib.parse import quote as _quote
 from openai import OpenAI
 import httpx
+import yaml
+
+try:
+    from yaml import CSafeLoader as _YamlLoader  # libyaml C bindings
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+try:
+    import orjson  # native-code JSON; big win on large commit bodies
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> bytes:
+    """Serialize with orjson when available, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
+
+def _json_loads(data):
+    """Deserialize with orjson when available, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 # Default model to use via OpenRouter
@@ -73,7 +103,6 @@ class TaskFile:
     owns: list[str]  # File patterns this task owns (e.g., ["src/auth/*.py"])
     title: str
     body: str
-    raw_content: str
 
     def to_markdown(self) -> str:
         """Convert back to markdown with YAML frontmatter."""
@@ -100,56 +129,143 @@ class TaskFile:
         return ""
 
 
+_TITLE_RE = re.compile(r"(?m)^#\s+(.+)$")
+_FM_LINE_RE = re.compile(r"^([A-Za-z_][\w-]*):\s*(.*)$")
+
+
+def _parse_simple_frontmatter(fm_text: str) -> Optional[dict]:
+    """One-pass parse of the flat ``key: value`` frontmatter to_markdown emits.
+
+    Task files are parsed on every poll, and yaml.load dominates that
+    cost. Our own frontmatter is always flat scalars and inline lists,
+    so handle that shape with a precompiled regex and return None for
+    anything fancier (quoting, nesting, anchors, comments) so the
+    caller can fall back to the full YAML parser.
+    """
+    out: dict = {}
+    for line in fm_text.splitlines():
+        if not line.strip():
+            continue
+        m = _FM_LINE_RE.match(line)
+        if m is None:
+            return None
+        raw = m.group(2).strip()
+        if raw.startswith(("'", '"', "{", "|", ">", "&", "*")) or "#" in raw:
+            return None
+        if raw.startswith("["):
+            if not raw.endswith("]"):
+                return None
+            inner = raw[1:-1].strip()
+            out[m.group(1)] = [p.strip() for p in inner.split(",")] if inner else []
+        elif raw in ("", "null", "~"):
+            out[m.group(1)] = None
+        elif raw.lstrip("-").isdigit():
+            out[m.group(1)] = int(raw)
+        else:
+            out[m.group(1)] = raw
+    return out
+
+
+def _as_str_list(value) -> list[str]:
+    """Normalize a frontmatter list field to strings.
+
+    YAML reads task numbers like 001 as integers, so re-pad them to keep
+    the zero-padded form the task filenames use.
+    """
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [f"{v:03d}" if isinstance(v, int) else str(v).strip() for v in value]
+
+
+def parse_task_frontmatter(prefix: str) -> dict:
+    """Parse only the YAML frontmatter from a task file prefix.
+
+    Works on a truncated prefix (e.g. from read_file_head) as long as it
+    includes the closing --- delimiter.
+    """
+    if not prefix.startswith("---"):
+        return {}
+    parts = prefix.split("---", 2)
+    if len(parts) < 3:
+        return {}
+    frontmatter = _parse_simple_frontmatter(parts[1])
+    if frontmatter is None:
+        try:
+            frontmatter = yaml.load(parts[1], Loader=_YamlLoader) or {}
+        except yaml.YAMLError:
+            return {}
+    frontmatter["depends_on"] = _as_str_list(frontmatter.get("depends_on"))
+    frontmatter["owns"] = _as_str_list(frontmatter.get("owns"))
+    return frontmatter
+
+
+# Memoize parses: the poll loops re-parse identical task bodies every
+# few seconds. Keyed on (path, hash(content)) so edits invalidate.
+_parse_cache: dict[tuple[str, int], TaskFile] = {}
+
+
 def parse_task_file(path: str, content: str) -> TaskFile:
+    """Parse a task file with YAML frontmatter (memoized on content)."""
+    key = (path, hash(content))
+    hit = _parse_cache.get(key)
+    if hit is not None:
+        # Copy, including the list fields -- sharing those with the
+        # cached entry would let a caller's mutation poison every
+        # later hit for this file.
+        return replace(hit, depends_on=list(hit.depends_on), owns=list(hit.owns))
+    task = _parse_task_file_impl(path, content)
+    if len(_parse_cache) > 1024:
+        _parse_cache.clear()
+    _parse_cache[key] = task
+    # Hand out a copy here too so the cached entry stays pristine.
+    return replace(task, depends_on=list(task.depends_on), owns=list(task.owns))
+
+
+def _parse_task_file_impl(path: str, content: str) -> TaskFile:
     """Parse a task file with YAML frontmatter."""
     # Split frontmatter from body
     frontmatter = {}
     body = content
-    title = ""
 
     if content.startswith("---"):
         parts = content.split("---", 2)
         if len(parts) >= 3:
-            fm_text = parts[1].strip()
+            fm_text = parts[1]
             body = parts[2].strip()
-
-            # Simple YAML parsing for our known fields
-            for line in fm_text.split("\n"):
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    key = key.strip()
-                    value = value.strip()
-
-                    if value == "null" or value == "":
-                        frontmatter[key] = None
-                    elif value.startswith("[") and value.endswith("]"):
-                        # Parse simple list
-                        inner = value[1:-1].strip()
-                        if inner:
-                            frontmatter[key] = [v.strip() for v in inner.split(",")]
-                        else:
-                            frontmatter[key] = []
-                    elif value.isdigit():
-                        frontmatter[key] = int(value)
-                    else:
-                        frontmatter[key] = value
+            frontmatter = _parse_simple_frontmatter(fm_text)
+            if frontmatter is None:
+                try:
+                    frontmatter = yaml.load(fm_text, Loader=_YamlLoader) or {}
+                except yaml.YAMLError:
+                    frontmatter = {}
 
     # Extract title from body
-    for line in body.split("\n"):
-        if line.startswith("# "):
-            title = line[2:].strip()
-            break
+    m = _TITLE_RE.search(body)
+    title = m.group(1).strip() if m else ""
+
+    frontmatter["depends_on"] = _as_str_list(frontmatter.get("depends_on"))
+    frontmatter["owns"] = _as_str_list(frontmatter.get("owns"))
+
+    # Normalize priority to an int: a null/empty/garbage value would
+    # otherwise flow into priority-keyed sorts and raise TypeError.
+    priority = frontmatter.get("priority", 3)
+    if not isinstance(priority, int):
+        try:
+            priority = int(priority)
+        except (TypeError, ValueError):
+            priority = 3
 
     return TaskFile(
         path=path,
         status=frontmatter.get("status", "pending"),
         claimed_by=frontmatter.get("claimed_by"),
-        priority=frontmatter.get("priority", 3),
+        priority=priority,
         depends_on=frontmatter.get("depends_on", []),
         owns=frontmatter.get("owns", []),
         title=title,
         body=body,
-        raw_content=content,
     )
 
 
@@ -157,6 +273,42 @@ def parse_task_file(path: str, content: str) -> TaskFile:
 # Scraps API Client
 # ---------------------------------------------------------------------------
 
+class AdaptiveThrottle:
+    """AIMD request-rate limiter shared across ScrapsClient instances.
+
+    Additively grows the allowed rate while requests succeed and halves
+    it on 429, so agents back off *before* the server has to keep
+    pushing back. With several agents sharing one quota this avoids
+    most rate-limit errors instead of just reacting to them.
+    """
+
+    def __init__(self, rate: float = 20.0, rate_min: float = 0.5, rate_max: float = 100.0):
+        self.rate = rate
+        self.rate_min = rate_min
+        self.rate_max = rate_max
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request slot is available."""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._next_slot - now)
+            self._next_slot = max(now, self._next_slot) + 1.0 / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+    def on_success(self):
+        self.rate = min(self.rate_max, self.rate * 1.05)
+
+    def on_backoff(self):
+        self.rate = max(self.rate_min, self.rate * 0.5)
+
+
+# One throttle per process: all clients share the same API quota.
+_throttle = AdaptiveThrottle()
+
+
 class ScrapsClient:
     """Client for Scraps API with retry logic."""
 
@@ -166,48 +318,165 @@ class ScrapsClient:
         self.repo = repo
         self.branch = branch
         self.agent_id = agent_id or f"agent-{os.getpid()}"
+        # HTTP/2 multiplexing + a generous keepalive pool: the polling loops
+        # make hundreds of calls per minute, so warm sockets matter.
         self.http = httpx.Client(
             base_url=base_url,
             headers={"Authorization": f"Bearer {api_key}"},
-            timeout=30.0,
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=256,
+                max_keepalive_connections=64,
+                keepalive_expiry=300.0,
+            ),
+            timeout=httpx.Timeout(connect=5.0, read=30.0, write=30.0, pool=5.0),
         )
-
-    def _retry(self, fn, max_attempts: int = 5, base_delay: float = 2.0):
-        """Execute fn with exponential backoff on rate limit errors."""
+        # ETag revalidation cache for file reads: {path: (etag, content)}.
+        # Most polls re-read unchanged files, so a 304 saves the body transfer.
+        self._file_cache: dict[str, tuple[str, str]] = {}
+        # Short-TTL cache for tree listings: {path: (fetched_at, files)}.
+        self._tree_cache: dict[str, tuple[float, list[str]]] = {}
+        self._tree_ttl = 2.0
+        # Events are queued and flushed by a background thread so the
+        # claim/commit hot path never blocks on an extra round trip.
+        self._event_q: queue.Queue = queue.Queue(maxsize=1000)
+        self._event_batch_ok = True
+        self._events_follow_ok = True
+        self._activity_offset: Optional[str] = None  # wait_for_activity cursor
+        self._event_thread = threading.Thread(target=self._event_sender, daemon=True)
+        self._event_thread.start()
+        atexit.register(self.flush_events)
+        # URL prefixes rebuilt on every call add up in the hot path
+        api_prefix = f"/api/v1/stores/{self.store}/repos/{self.repo}"
+        self._files_prefix = f"{api_prefix}/files/{self.branch}/"
+        self._tree_prefix = f"{api_prefix}/tree/{self.branch}"
+        self._events_url = f"{api_prefix}/streams/events"
+        self._commits_url = f"{api_prefix}/commits"
+
+    def _request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Issue an HTTP request through the shared adaptive throttle.
+
+        Accepts a json= kwarg like httpx but serializes it with orjson
+        when available.
+        """
+        payload = kwargs.pop("json", None)
+        if payload is not None:
+            kwargs["content"] = _json_dumps(payload)
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), "Content-Type": "application/json"}
+        _throttle.acquire()
+        r = self.http.request(method, url, **kwargs)
+        if r.status_code == 429:
+            _throttle.on_backoff()
+        else:
+            _throttle.on_success()
+        return r
+
+    def _retry(self, fn, max_attempts: int = 5, base_delay: float = 0.1,
+               max_delay: float = 30.0):
+        """Execute fn with decorrelated-jitter backoff on rate limit errors.
+
+        Honors the server's Retry-After header when present; otherwise
+        sleeps uniform(base, prev*3) capped at max_delay, which avoids the
+        synchronized, often-too-long waits of plain exponential backoff.
+        """
         last_error = None
+        prev_delay = base_delay
         for attempt in range(max_attempts):
             try:
                 return fn()
             except Exception as e:
                 last_error = e
                 error_str = str(e).lower()
-                status_code = getattr(e, "response", None)
-                if status_code:
-                    status_code = getattr(status_code, "status_code", None)
+                response = getattr(e, "response", None)
+                status_code = getattr(response, "status_code", None)
 
                 if "rate limit" not in error_str and "429" not in error_str and status_code != 429:
                     raise
-                delay = base_delay * (2 ** attempt) + random.uniform(0, 1)
+
+                retry_after = getattr(response, "headers", {}).get("Retry-After") if response else None
+                if retry_after:
+                    try:
+                        delay = min(max_delay, float(retry_after))
+                    except ValueError:
+                        delay = prev_delay
+                else:
+                    delay = min(max_delay, random.uniform(base_delay, prev_delay * 3))
+                    prev_delay = delay
                 print(f"  ... Rate limited, retrying in {delay:.1f}s")
                 time.sleep(delay)
         raise last_error
 
     def stream_event(self, event_type: str, **data):
-        """Publish event to stream."""
+        """Queue an event for the background sender (non-blocking)."""
         try:
-            r = self.http.post(
-                f"/api/v1/stores/{self.store}/repos/{self.repo}/streams/events",
-                json={"type": event_type, "agent_id": self.agent_id, **data},
-            )
-            if r.status_code != 200:
-                print(f"  [stream] Failed to send {event_type}: {r.status_code}")
-        except httpx.RequestError as e:
-            print(f"  [stream] Error sending {event_type}: {e}")
+            self._event_q.put_nowait({"type": event_type, "agent_id": self.agent_id, **data})
+        except queue.Full:
+            # Drop rather than block the hot path; events are advisory.
+            pass
+
+    def _event_sender(self):
+        """Background loop: drain the event queue and post in batches."""
+        while True:
+            batch = []
+            try:
+                batch.append(self._event_q.get(timeout=0.5))
+            except queue.Empty:
+                continue
+            # Coalesce whatever else has accumulated, up to 50 per POST.
+            while len(batch) < 50:
+                try:
+                    batch.append(self._event_q.get_nowait())
+                except queue.Empty:
+                    break
+            # Events are advisory; a single unserializable or otherwise
+            # bad batch must not kill the daemon thread and silently
+            # drop every event for the rest of the process.
+            try:
+                self._post_events(batch)
+            except Exception as e:
+                print(f"  [stream] Dropped batch of {len(batch)} event(s): {e}")
+
+    def _post_events(self, batch: list[dict]):
+        """Post a batch of events, falling back to per-event POSTs."""
+        events_url = self._events_url
+        if self._event_batch_ok and len(batch) > 1:
+            try:
+                r = self._request("POST", f"{events_url}:batch", json={"events": batch})
+                if r.status_code == 200:
+                    return
+                if r.status_code == 404:
+                    self._event_batch_ok = False
+            except httpx.RequestError:
+                pass
+        for event in batch:
+            try:
+                r = self._request("POST", events_url, json=event)
+                if r.status_code != 200:
+                    print(f"  [stream] Failed to send {event.get('type')}: {r.status_code}")
+            except httpx.RequestError as e:
+                print(f"  [stream] Error sending {event.get('type')}: {e}")
+
+    def flush_events(self):
+        """Synchronously drain and send anything still queued (exit path)."""
+        batch = []
+        while True:
+            try:
+                batch.append(self._event_q.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            # Same guard as the sender loop: this runs from atexit, and
+            # a raise here would surface as an ugly shutdown traceback.
+            try:
+                self._post_events(batch)
+            except Exception as e:
+                print(f"  [stream] Dropped batch of {len(batch)} event(s): {e}")
 
     def claim(self, patterns: list[str], reason: str) -> bool:
         """Claim exclusive access to files."""
         try:
-            r = self.http.post(
+            r = self._request(
+                "POST",
                 f"/stores/{self.store}/repos/{self.repo}/branches/{self.branch}/coordinate/claim",
                 json={"agent_id": self.agent_id, "patterns": patterns, "claim": reason},
             )
@@ -221,7 +490,7 @@ class ScrapsClient:
     def release(self, patterns: list[str]):
         """Release file claims."""
         try:
-            self.http.request(
+            self._request(
                 "DELETE",
                 f"/stores/{self.store}/repos/{self.repo}/branches/{self.branch}/coordinate/claim",
                 json={"agent_id": self.agent_id, "patterns": patterns},
@@ -230,33 +499,132 @@ class ScrapsClient:
         except httpx.RequestError:
             pass
 
+    def release_async(self, patterns: list[str]) -> threading.Thread:
+        """Release file claims on a background thread.
+
+        The coordinator has no atomic commit-and-release, so end-of-task
+        paths use this to overlap the release round trip with whatever
+        the caller does next instead of blocking on it. release() itself
+        swallows request errors, so fire-and-forget is safe.
+        """
+        t = threading.Thread(target=self.release, args=(patterns,), daemon=True)
+        t.start()
+        return t
+
     def read_file(self, path: str) -> Optional[str]:
         """Read a file from the repo."""
         try:
             # Endpoint: /api/v1/stores/{store}/repos/{repo}/files/{branch}/{path}
             # Note: path must be URL-encoded (slashes become %2F)
-            from urllib.parse import quote
-            encoded_path = quote(path, safe='')
-            r = self.http.get(
-                f"/api/v1/stores/{self.store}/repos/{self.repo}/files/{self.branch}/{encoded_path}",
+            encoded_path = _quote(path, safe='')
+            cached = self._file_cache.get(path)
+            headers = {"If-None-Match": cached[0]} if cached else None
+            r = self._request(
+                "GET",
+                f"{self._files_prefix}{encoded_path}",
+                headers=headers,
+            )
+            if r.status_code == 304 and cached:
+                return cached[1]
+            if r.status_code == 200:
+                data = _json_loads(r.content)
+                content = data.get("content")
+                etag = r.headers.get("ETag")
+                if etag and content is not None:
+                    self._file_cache[path] = (etag, content)
+                return content
+        except httpx.RequestError:
+            pass
+        return None
+
+    def _async_client(self) -> httpx.AsyncClient:
+        """Build an AsyncClient sharing this client's base URL and auth headers."""
+        return httpx.AsyncClient(
+            base_url=self.http.base_url,
+            headers=self.http.headers,
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            timeout=30.0,
+        )
+
+    async def read_file_async(self, client: httpx.AsyncClient, path: str) -> Optional[str]:
+        """Async mirror of read_file, using the given AsyncClient."""
+        try:
+            encoded_path = _quote(path, safe='')
+            cached = self._file_cache.get(path)
+            headers = {"If-None-Match": cached[0]} if cached else None
+            r = await client.get(
+                f"{self._files_prefix}{encoded_path}",
+                headers=headers,
             )
+            if r.status_code == 304 and cached:
+                return cached[1]
             if r.status_code == 200:
-                data = r.json()
-                return data.get("content")
+                data = _json_loads(r.content)
+                content = data.get("content")
+                etag = r.headers.get("ETag")
+                if etag and content is not None:
+                    self._file_cache[path] = (etag, content)
+                return content
         except httpx.RequestError:
             pass
         return None
 
+    def _read_files_batch(self, paths: list[str]) -> Optional[dict[str, str]]:
+        """Read files via the batch endpoint. Returns None if unsupported."""
+        contents: dict[str, str] = {}
+        try:
+            # Chunk the request so huge trees don't produce oversized bodies.
+            for i in range(0, len(paths), 64):
+                r = self._request(
+                    "POST",
+                    f"{self._files_prefix}batch",
+                    json={"paths": paths[i:i + 64]},
+                )
+                if r.status_code != 200:
+                    return None
+                files = _json_loads(r.content).get("files", {})
+                contents.update({p: c for p, c in files.items() if c is not None})
+            return contents
+        except httpx.RequestError:
+            return None
+
+    def read_files(self, paths: list[str]) -> dict[str, str]:
+        """Read many files in as few round trips as possible.
+
+        Prefers the server's batch endpoint (one POST per 64 paths);
+        falls back to concurrent single-file GETs. Returns {path: content},
+        skipping missing files.
+        """
+        if not paths:
+            return {}
+
+        batched = self._read_files_batch(paths)
+        if batched is not None:
+            return batched
+
+        async def gather_all():
+            async with self._async_client() as client:
+                contents = await asyncio.gather(
+                    *(self.read_file_async(client, p) for p in paths)
+                )
+            return {p: c for p, c in zip(paths, contents) if c is not None}
+
+        return asyncio.run(gather_all())
+
     def list_files(self, path: str = "") -> list[str]:
         """List files in the repo directory."""
+        cached = self._tree_cache.get(path)
+        if cached and time.time() - cached[0] < self._tree_ttl:
+            return cached[1]
         try:
             # Endpoint: /api/v1/stores/{store}/repos/{repo}/tree/{branch}/{path}
-            url = f"/api/v1/stores/{self.store}/repos/{self.repo}/tree/{self.branch}"
+            url = self._tree_prefix
             if path:
                 url += f"/{path}"
-            r = self.http.get(url)
+            r = self._request("GET", url)
             if r.status_code == 200:
-                data = r.json()
+                data = _json_loads(r.content)
                 # Response format: {"entries": [{"name": "file.md", "type": "blob", ...}, ...]}
                 entries = data.get("entries", [])
                 files = []
@@ -268,29 +636,72 @@ class ScrapsClient:
                             files.append(f"{path}/{name}")
                         else:
                             files.append(name)
+                self._tree_cache[path] = (time.time(), files)
                 return files
         except httpx.RequestError as e:
             print(f"  Error listing files: {e}")
         return []
 
-    def commit(self, message: str, files: dict[str, str]) -> str:
-        """Commit files to git. Returns commit SHA."""
+    def read_tree(self, prefix: str = "") -> dict[str, str]:
+        """Read every file under a subtree in as few round trips as possible.
+
+        Tries a single tree request asking the server to inline blob
+        contents; servers that don't support it fall back to one
+        listing plus a batched read. Returns {path: content}.
+        """
+        try:
+            url = self._tree_prefix
+            if prefix:
+                url += f"/{prefix}"
+            r = self._request("GET", url, params={"recursive": "true", "include": "content"})
+            if r.status_code == 200:
+                entries = _json_loads(r.content).get("entries", [])
+                contents: dict[str, str] = {}
+                inlined = True
+                for entry in entries:
+                    if entry.get("type") != "blob":
+                        continue
+                    if entry.get("content") is None:
+                        inlined = False
+                        break
+                    name = entry.get("name")
+                    contents[f"{prefix}/{name}" if prefix else name] = entry["content"]
+                if inlined:
+                    return contents
+        except httpx.RequestError:
+            pass
+        return self.read_files(self.list_files(prefix))
+
+    def commit(self, message: str, files) -> str:
+        """Commit files to git. Returns commit SHA.
+
+        files may be a dict or any iterable of (path, content) pairs;
+        pairs are serialized directly without materializing a dict.
+        """
+        pairs = files.items() if isinstance(files, dict) else files
+        file_entries = [{"path": p, "content": c} for p, c in pairs]
+
         def do_commit():
-            r = self.http.post(
-                f"/api/v1/stores/{self.store}/repos/{self.repo}/commits",
+            r = self._request(
+                "POST",
+                self._commits_url,
                 json={
                     "branch": self.branch,
                     "message": message,
                     "author": {"name": self.agent_id, "email": f"{self.agent_id}@agent.local"},
-                    "files": [{"path": p, "content": c} for p, c in files.items()],
+                    "files": file_entries,
                 },
             )
-            data = r.json()
+            data = _json_loads(r.content)
             if "error" in data:
                 raise Exception(f"Commit failed: {data['error']}")
             return data["commit"]["commit_sha"]
 
-        return self._retry(do_commit)
+        sha = self._retry(do_commit)
+        # Our own writes invalidate anything we have cached.
+        self._file_cache.clear()
+        self._tree_cache.clear()
+        return sha
 
     def get_stream_events(self, offset: Optional[str] = None, limit: int = 100) -> tuple[list[dict], Optional[str]]:
         """Get events from stream. Returns (events, next_offset)."""
@@ -298,29 +709,154 @@ class ScrapsClient:
             params = {"limit": limit}
             if offset:
                 params["offset"] = offset
-            r = self.http.get(
-                f"/api/v1/stores/{self.store}/repos/{self.repo}/streams/events",
+            r = self._request(
+                "GET",
+                self._events_url,
                 params=params,
             )
             if r.status_code == 200:
-                data = r.json()
+                data = _json_loads(r.content)
                 next_offset = r.headers.get("Stream-Next-Offset")
                 return data.get("events", []), next_offset
         except httpx.RequestError:
             pass
         return [], None
 
+    def read_file_head(self, path: str, nbytes: int = 4096) -> Optional[str]:
+        """Read just the first nbytes of a file (enough for frontmatter).
+
+        Sends an HTTP Range request when the server honors it; otherwise
+        falls back to a full read and truncates locally.
+        """
+        try:
+            encoded_path = _quote(path, safe='')
+            url = f"{self._files_prefix}{encoded_path}"
+            r = self._request(
+                "GET",
+                url,
+                headers={"Range": f"bytes=0-{nbytes - 1}"},
+            )
+            if r.status_code == 206:
+                ctype = r.headers.get("Content-Type", "")
+                if "json" not in ctype:
+                    return r.text
+                # The files endpoint serves a {"content": ...} JSON
+                # envelope, and a ranged response may cut it off
+                # mid-document; unwrap when it parses, otherwise
+                # re-fetch in full below.
+                try:
+                    data = _json_loads(r.content)
+                except ValueError:
+                    r = self._request("GET", url)
+                else:
+                    content = data.get("content")
+                    return content[:nbytes] if content else content
+            if r.status_code == 200:
+                content = _json_loads(r.content).get("content")
+                return content[:nbytes] if content else content
+        except httpx.RequestError:
+            pass
+        return None
+
+    def get_task_status(self, task_number: str) -> Optional[str]:
+        """Get just the status of a task, reading only its frontmatter bytes."""
+        for filepath in self.list_files("tasks"):
+            if filepath.startswith(f"tasks/{task_number}-"):
+                head = self.read_file_head(filepath)
+                if head:
+                    return parse_task_frontmatter(head).get("status")
+                return None
+        return None
+
+    def list_tasks_by_status(self, status: str) -> Optional[list[dict]]:
+        """List task metadata filtered server-side.
+
+        Returns a list of {path, status, title, depends_on} dicts, or None
+        if the server doesn't support the tasks endpoint (callers should
+        fall back to list_files + read + parse).
+        """
+        try:
+            r = self._request(
+                "GET",
+                f"/api/v1/stores/{self.store}/repos/{self.repo}/tasks",
+                params={
+                    "branch": self.branch,
+                    "status": status,
+                    "fields": "path,status,title,depends_on",
+                },
+            )
+            if r.status_code == 200:
+                return _json_loads(r.content).get("tasks", [])
+        except httpx.RequestError:
+            pass
+        return None
+
+    def stream_events_iter(self, offset: Optional[str] = None,
+                           types: Optional[tuple[str, ...]] = None,
+                           deadline: Optional[float] = None,
+                           poll_interval: float = 1.0):
+        """Yield stream events as they arrive.
+
+        Tries a long-lived follow=true read first; if the server doesn't
+        support following, falls back to polling get_stream_events.
+        Stops when deadline (a time.time() value) passes.
+        """
+        params = {"follow": "true"}
+        if offset:
+            params["offset"] = offset
+        if self._events_follow_ok:
+            try:
+                read_timeout = None if deadline is None else max(1.0, deadline - time.time())
+                with self.http.stream(
+                    "GET",
+                    self._events_url,
+                    params=params,
+                    timeout=httpx.Timeout(connect=5.0, read=read_timeout, write=30.0, pool=5.0),
+                ) as r:
+                    # A server that ignores the unknown follow param
+                    # still answers 200, but with the one-shot
+                    # {"events": [...]} JSON envelope; only a line-
+                    # oriented content type means we're actually live.
+                    ctype = r.headers.get("Content-Type", "")
+                    live = r.status_code == 200 and any(
+                        t in ctype for t in ("ndjson", "jsonlines", "event-stream"))
+                    if live:
+                        for line in r.iter_lines():
+                            if not line.strip():
+                                continue
+                            try:
+                                event = json.loads(line)
+                            except json.JSONDecodeError:
+                                continue
+                            if types and event.get("type") not in types:
+                                continue
+                            yield event
+                            if deadline is not None and time.time() > deadline:
+                                return
+                        return
+                    if r.status_code in (200, 404):
+                        # No follow semantics on this server; remember
+                        # and go straight to polling from now on.
+                        self._events_follow_ok = False
+            except httpx.RequestError:
+                pass
+
+        # Fallback: poll the batch endpoint.
+        while deadline is None or time.time() < deadline:
+            events, next_offset = self.get_stream_events(offset=offset)
+            for event in events:
+                if not types or event.get("type") in types:
+                    yield event
+            if next_offset:
+                offset = next_offset
+            if not events:
+                time.sleep(poll_interval)
+
     def get_all_tasks(self) -> list["TaskFile"]:
         """Get all task files from the repo."""
-        tasks = []
-        files = self.list_files("tasks")
-        for filepath in sorted(files):
-            if not filepath.endswith(".md"):
-                continue
-            content = self.read_file(filepath)
-            if content:
-                tasks.append(parse_task_file(filepath, content))
-        return tasks
+        files = [f for f in sorted(self.list_files("tasks")) if f.endswith(".md")]
+        contents = self.read_files(files)
+        return [parse_task_file(f, contents[f]) for f in files if contents.get(f)]
 
     def get_task_by_number(self, task_number: str) -> Optional["TaskFile"]:
         """Get a specific task by its number (e.g., '001')."""
@@ -337,35 +873,93 @@ class ScrapsClient:
         if not task.depends_on:
             return True
 
-        start_time = time.time()
-        while time.time() - start_time < max_wait:
-            all_completed = True
-            for dep_num in task.depends_on:
-                dep_task = self.get_task_by_number(dep_num)
-                if not dep_task or dep_task.status != "completed":
-                    all_completed = False
-                    print(f"    Waiting for task {dep_num} to complete...")
-                    break
+        # Check current state first -- dependencies may already be done.
+        # Only the frontmatter is needed, so read just the file heads.
+        remaining = set(task.depends_on)
+        for dep_num in list(remaining):
+            if self.get_task_status(dep_num) == "completed":
+                remaining.discard(dep_num)
+        if not remaining:
+            return True
 
-            if all_completed:
+        # Block on the event stream instead of polling every dependency.
+        print(f"    Waiting for tasks {sorted(remaining)} to complete...")
+        deadline = time.time() + max_wait
+        for event in self.stream_events_iter(types=("task_complete",),
+                                             deadline=deadline,
+                                             poll_interval=poll_interval):
+            remaining.discard(str(event.get("task", "")))
+            if not remaining:
                 return True
 
-            time.sleep(poll_interval)
-
         print(f"    Timeout waiting for dependencies: {task.depends_on}")
         return False
 
+    def _stream_tail_offset(self, start: Optional[str] = None) -> Optional[str]:
+        """Walk the recent-events pages and return the current tail offset."""
+        offset = start
+        for _ in range(50):
+            events, next_offset = self.get_stream_events(offset=offset)
+            if next_offset:
+                offset = next_offset
+            if not events or not next_offset:
+                break
+        return offset
+
+    def wait_for_activity(self, timeout: float,
+                          types: tuple[str, ...] = ("task_complete",)) -> bool:
+        """Block until another agent reports NEW activity, or timeout passes.
+
+        Drop-in replacement for the fixed time.sleep() in poll loops:
+        wakes as soon as a relevant event arrives on the stream instead
+        of sleeping out the full interval, while the timeout keeps the
+        caller's housekeeping checks firing even if an event is missed.
+        Returns True if an event woke us.
+
+        The events endpoint replays recent history, so a cursor is kept
+        across calls: seeded at the stream tail on first use and
+        advanced past everything seen after each wait. Without it, one
+        old task_complete event would satisfy every future wait
+        instantly and turn the caller's idle loop into a hot spin.
+        """
+        if self._activity_offset is None:
+            self._activity_offset = self._stream_tail_offset()
+            if self._activity_offset is None:
+                # No offset support (or no events yet): we can't tell
+                # new events from replayed ones, so just sleep.
+                time.sleep(timeout)
+                return False
+        deadline = time.time() + timeout
+        woke = False
+        for _ in self.stream_events_iter(offset=self._activity_offset,
+                                         types=types, deadline=deadline,
+                                         poll_interval=min(1.0, timeout)):
+            woke = True
+            break
+        # Advance past whatever arrived during this wait so the next
+        # call only triggers on genuinely new activity.
+        self._activity_offset = self._stream_tail_offset(self._activity_offset)
+        return woke
+
 
 # ---------------------------------------------------------------------------
 # Stream Debouncer (for live streaming)
 # ---------------------------------------------------------------------------
 
 class StreamDebouncer:
-    """Debounce streaming updates to avoid overwhelming the server."""
+    """Debounce streaming updates to avoid overwhelming the server.
+
+    By default an update goes out when EITHER the interval has elapsed
+    OR enough characters accumulated. With require_both=True, BOTH
+    gates must pass -- a stricter budget for high-volume streams where
+    either condition alone would still fire too often.
+    """
 
-    def __init__(self, min_interval: float = 0.5, min_chars: int = 50):
+    def __init__(self, min_interval: float = 0.5, min_chars: int = 50,
+                 require_both: bool = False):
         self.min_interval = min_interval
         self.min_chars = min_chars
+        self.require_both = require_both
         self.last_send_time = 0.0
         self.last_send_length = 0
         self.pending_event: Optional[dict] = None
@@ -374,6 +968,8 @@ class StreamDebouncer:
         now = time.time()
         time_elapsed = now - self.last_send_time
         chars_added = content_length - self.last_send_length
+        if self.require_both:
+            return time_elapsed >= self.min_interval and chars_added >= self.min_chars
         return time_elapsed >= self.min_interval or chars_added >= self.min_chars
 
     def mark_sent(self, content_length: int):
@@ -389,12 +985,248 @@ class StreamDebouncer:
         return event
 
 
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b",
+                 "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class ToolArgStreamer:
+    """Incrementally extract string values from streaming tool-call JSON.
+
+    Fed each arguments delta as it arrives, this walks a flat JSON
+    object ({"path": "...", "content": "..."}) with a character state
+    machine -- O(n) total work, versus re-running json.loads over the
+    ever-growing buffer on every delta. Escapes (\\", \\n, \\uXXXX, ...)
+    are decoded on the fly, including across chunk boundaries.
+
+    path is available as soon as its value string closes; content/
+    content_len track the (possibly still-open) content value.
+    """
+
+    def __init__(self):
+        self.path = ""
+        self.content_len = 0
+        self._content: list[str] = []
+        self._key: list[str] = []
+        self._path_buf: list[str] = []
+        self._state = "pre"       # pre, pre_key, str, colon, pre_value, skip, pre_comma
+        self._target = ""         # key, path, content, or "" (uncaptured)
+        self._escape = False
+        self._unicode: Optional[str] = None
+        self._pending_high: Optional[int] = None  # high surrogate awaiting its pair
+        self._skip_depth = 0
+        self._skip_in_str = False
+        self._skip_escape = False
+
+    @property
+    def content(self) -> str:
+        return "".join(self._content)
+
+    def _emit(self, ch: str):
+        if self._target == "key":
+            self._key.append(ch)
+        elif self._target == "path":
+            self._path_buf.append(ch)
+        elif self._target == "content":
+            self._content.append(ch)
+            self.content_len += 1
+
+    def _flush_high(self):
+        # A buffered high surrogate whose low half never arrived; pass
+        # it through as-is, matching json.loads on unpaired escapes.
+        if self._pending_high is not None:
+            self._emit(chr(self._pending_high))
+            self._pending_high = None
+
+    def feed(self, delta: str):
+        for ch in delta:
+            state = self._state
+            if state == "str":
+                if self._unicode is not None:
+                    self._unicode += ch
+                    if len(self._unicode) == 4:
+                        try:
+                            code = int(self._unicode, 16)
+                        except ValueError:
+                            code = None
+                        self._unicode = None
+                        if code is not None:
+                            if self._pending_high is not None:
+                                high = self._pending_high
+                                self._pending_high = None
+                                if 0xDC00 <= code <= 0xDFFF:
+                                    # Combine the surrogate pair into one
+                                    # character, as json.loads does.
+                                    code = 0x10000 + ((high - 0xD800) << 10) + (code - 0xDC00)
+                                else:
+                                    self._emit(chr(high))
+                            if 0xD800 <= code <= 0xDBFF:
+                                # High surrogate: hold it until the low
+                                # half of the \uXXXX\uXXXX pair arrives.
+                                self._pending_high = code
+                            else:
+                                self._emit(chr(code))
+                    continue
+                if self._escape:
+                    self._escape = False
+                    if ch == "u":
+                        self._unicode = ""
+                    else:
+                        self._flush_high()
+                        self._emit(_JSON_ESCAPES.get(ch, ch))
+                    continue
+                if ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._flush_high()
+                    if self._target == "key":
+                        self._state = "colon"
+                    else:
+                        if self._target == "path":
+                            self.path = "".join(self._path_buf)
+                        self._state = "pre_comma"
+                else:
+                    self._flush_high()
+                    self._emit(ch)
+            elif state == "pre":
+                if ch == "{":
+                    self._state = "pre_key"
+            elif state == "pre_key":
+                if ch == '"':
+                    self._key = []
+                    self._target = "key"
+                    self._state = "str"
+            elif state == "colon":
+                if ch == ":":
+                    self._state = "pre_value"
+            elif state == "pre_value":
+                if ch == '"':
+                    key = "".join(self._key)
+                    self._target = key if key in ("path", "content") else ""
+                    self._state = "str"
+                elif ch in "{[":
+                    self._skip_depth = 1
+                    self._state = "skip"
+                elif not ch.isspace():
+                    self._skip_depth = 0
+                    self._state = "skip"
+            elif state == "skip":
+                # Uncaptured value: track nesting until it ends. String
+                # literals inside it may contain braces/brackets/commas,
+                # so they must not move the depth count.
+                if self._skip_in_str:
+                    if self._skip_escape:
+                        self._skip_escape = False
+                    elif ch == "\\":
+                        self._skip_escape = True
+                    elif ch == '"':
+                        self._skip_in_str = False
+                elif ch == '"':
+                    self._skip_in_str = True
+                elif ch in "{[":
+                    self._skip_depth += 1
+                elif ch in "}]":
+                    self._skip_depth -= 1
+                elif ch == "," and self._skip_depth == 0:
+                    self._state = "pre_key"
+            elif state == "pre_comma":
+                if ch == ",":
+                    self._state = "pre_key"
+
+
+# ---------------------------------------------------------------------------
+# Streamed response assembly
+# ---------------------------------------------------------------------------
+
+@dataclass
+class StreamedFunction:
+    name: str
+    arguments: str
+
+
+@dataclass
+class StreamedToolCall:
+    id: str
+    function: StreamedFunction
+    type: str = "function"
+
+
+@dataclass
+class StreamedMessage:
+    content: str
+    tool_calls: list
+
+
+@dataclass
+class StreamedChoice:
+    message: StreamedMessage
+    finish_reason: Optional[str] = None
+
+
+@dataclass
+class StreamedResponse:
+    """Response-shaped container assembled from streaming deltas.
+
+    Mimics the parts of the OpenAI response object that
+    add_assistant_response and the tool-dispatch loops read.
+    """
+    choices: list
+
+    @classmethod
+    def from_parts(cls, content: str, tool_calls: dict,
+                   finish_reason: Optional[str] = None) -> "StreamedResponse":
+        """Build from accumulated text and a {id: {name, arguments}} dict."""
+        calls = [
+            StreamedToolCall(id=tc_id, function=StreamedFunction(tc["name"], tc["arguments"]))
+            for tc_id, tc in tool_calls.items()
+        ]
+        return cls([StreamedChoice(StreamedMessage(content, calls), finish_reason)])
+
+
 # ---------------------------------------------------------------------------
 # LLM Client Wrapper (OpenRouter)
 # ---------------------------------------------------------------------------
 
+def estimate_tokens(text: str) -> int:
+    """Rough local token estimate (~4 chars/token for code-heavy text).
+
+    OpenRouter doesn't proxy Anthropic's count_tokens endpoint, so this
+    stands in for pre-flight context budgeting; it only needs to be
+    good enough to prune before the request, not exact.
+    """
+    return len(text) // 4 + 1
+
+
+class APICreditsError(Exception):
+    """Raised when API credits are exhausted."""
+    pass
+
+
+# One compiled alternation instead of lowercasing plus four substring
+# scans; matters when backoff storms hit this in a tight loop.
+_API_CREDITS_RE = re.compile(r"credit|billing|quota|insufficient", re.IGNORECASE)
+
+
+def check_api_error(e: Exception):
+    """Check if error is due to credit/billing issues and raise appropriate exception."""
+    if _API_CREDITS_RE.search(str(e)):
+        raise APICreditsError("API credits exhausted. Please add credits to your OpenRouter account.")
+    raise e
+
+
+
+# Agents are constructed repeatedly from the same module-level TOOLS
+# constants; memoize the conversion per tools list. Keyed by identity
+# (the schemas are unhashable dicts); the entry pins the source list
+# so its id can't be recycled.
+_converted_tools: dict[int, tuple[list[dict], list[dict]]] = {}
+
+
 def convert_anthropic_tools_to_openai(tools: list[dict]) -> list[dict]:
     """Convert Anthropic tool format to OpenAI function format."""
+    cached = _converted_tools.get(id(tools))
+    if cached is not None:
+        return cached[1]
+
     openai_tools = []
     for tool in tools:
         openai_tools.append({
@@ -405,35 +1237,80 @@ def convert_anthropic_tools_to_openai(tools: list[dict]) -> list[dict]:
                 "parameters": tool.get("input_schema", {"type": "object", "properties": {}}),
             }
         })
+    _converted_tools[id(tools)] = (tools, openai_tools)
     return openai_tools
 
 
 class LLMAgent:
     """Wrapper for OpenRouter API with tool support."""
 
-    def __init__(self, system_prompt: str, tools: list[dict], model: str = None):
-        api_key = os.environ.get("OPENROUTER_API_KEY")
-        if not api_key:
-            print("Error: OPENROUTER_API_KEY not set")
-            sys.exit(1)
+    _shared_client: Optional[OpenAI] = None
+
+    @classmethod
+    def get_shared_client(cls) -> OpenAI:
+        """One OpenAI client per process.
+
+        Each OpenAI() instance builds its own connection pool and TLS
+        session to openrouter.ai; sharing one avoids re-handshaking for
+        every agent constructed.
+        """
+        if cls._shared_client is None:
+            api_key = os.environ.get("OPENROUTER_API_KEY")
+            if not api_key:
+                print("Error: OPENROUTER_API_KEY not set")
+                sys.exit(1)
+            cls._shared_client = OpenAI(
+                base_url="https://openrouter.ai/api/v1",
+                api_key=api_key,
+                http_client=httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(max_keepalive_connections=16, keepalive_expiry=300.0),
+                    timeout=60.0,
+                ),
+            )
+        return cls._shared_client
 
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key,
-        )
+    def __init__(self, system_prompt: str, tools: list[dict], model: str = None,
+                 max_tokens: int = 4096, reasoning_budget: Optional[int] = None):
+        self.client = self.get_shared_client()
         self.system_prompt = system_prompt
         self.tools = convert_anthropic_tools_to_openai(tools)
         self.model = model or DEFAULT_MODEL
-        self.messages: list[dict] = [{"role": "system", "content": system_prompt}]
-
-    def send(self, content: str):
-        """Send a message and get response."""
+        self.max_tokens = max_tokens
+        # OpenRouter forwards a reasoning/thinking token budget to models
+        # that support extended thinking; None keeps provider defaults.
+        self.extra_body = (
+            {"reasoning": {"max_tokens": reasoning_budget}} if reasoning_budget else None
+        )
+        # Mark the static system prompt as cacheable so providers that
+        # support prompt caching (e.g. Anthropic via OpenRouter) don't
+        # re-process it on every turn of a long conversation.
+        self.messages: list[dict] = [{
+            "role": "system",
+            "content": [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }],
+        }]
+
+    def reset(self):
+        """Clear conversation history, keeping the system prompt."""
+        del self.messages[1:]
+
+    def send(self, content):
+        """Send a message and get response.
+
+        content may be a plain string or a list of content blocks (e.g.
+        to place cache_control breakpoints inside the user message).
+        """
         self.messages.append({"role": "user", "content": content})
         response = self.client.chat.completions.create(
             model=self.model,
-            max_tokens=4096,
+            max_tokens=self.max_tokens,
             tools=self.tools if self.tools else None,
             messages=self.messages,
+            extra_body=self.extra_body,
         )
         return response
 
@@ -458,7 +1335,7 @@ class LLMAgent:
             self.messages.append({
                 "role": "tool",
                 "tool_call_id": result["tool_use_id"],
-                "content": result["content"] if isinstance(result["content"], str) else json.dumps(result["content"]),
+                "content": result["content"] if isinstance(result["content"], str) else _json_dumps(result["content"]).decode(),
             })
 
     def stream(self, content: str):
@@ -466,10 +1343,11 @@ class LLMAgent:
         self.messages.append({"role": "user", "content": content})
         return self.client.chat.completions.create(
             model=self.model,
-            max_tokens=4096,
+            max_tokens=self.max_tokens,
             tools=self.tools if self.tools else None,
             messages=self.messages,
             stream=True,
+            extra_body=self.extra_body,
         )
 
 
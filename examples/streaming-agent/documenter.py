@@ -12,29 +12,20 @@ Usage:
 Environment:
     AGENT_ID     - Unique agent identifier (default: documenter-<pid>)
     BRANCH       - Git branch (default: main)
+    MAX_PARALLEL_DOCS - Tasks documented concurrently (default: 4)
 """
 
 import os
 import sys
 import json
-import time
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import openai
-from agent_base import ScrapsClient, ClaudeAgent, parse_task_file
-
-
-class APICreditsError(Exception):
-    """Raised when API credits are exhausted."""
-    pass
-
-
-def check_api_error(e: Exception):
-    """Check if error is due to credit/billing issues and raise appropriate exception."""
-    error_msg = str(e).lower()
-    if "credit" in error_msg or "billing" in error_msg or "quota" in error_msg or "insufficient" in error_msg:
-        raise APICreditsError("API credits exhausted. Please add credits to your OpenRouter account.")
-    raise e
+from agent_base import (
+    ScrapsClient, ClaudeAgent, StreamDebouncer, StreamedResponse, parse_task_file,
+    APICreditsError, check_api_error,
+)
 
 if len(sys.argv) < 3:
     print(f"Usage: {sys.argv[0]} <store> <repo>")
@@ -46,6 +37,7 @@ BRANCH = os.environ.get("BRANCH", "main")
 AGENT_ID = os.environ.get("AGENT_ID", f"documenter-{os.getpid()}")
 
 POLL_INTERVAL = 5.0  # seconds between checking for completed tasks
+MAX_PARALLEL_DOCS = int(os.environ.get("MAX_PARALLEL_DOCS", "4"))
 
 # ---------------------------------------------------------------------------
 # Tools for Claude
@@ -87,22 +79,30 @@ TOOLS = [
 ]
 
 
-def get_completed_tasks(scraps: ScrapsClient) -> list[tuple[str, str]]:
-    """Get all completed task files. Returns list of (path, content)."""
-    completed = []
-    files = scraps.list_files("tasks")
+def get_completed_tasks(scraps: ScrapsClient) -> list[str]:
+    """Get paths of all completed task files.
 
-    for filepath in sorted(files):
-        if not filepath.endswith(".md"):
-            continue
+    Uses server-side status filtering when available so idle polls don't
+    download every task body; bodies are fetched only for tasks we
+    actually document.
+    """
+    meta = scraps.list_tasks_by_status("completed")
+    if meta is not None:
+        return sorted(m["path"] for m in meta if m.get("path"))
 
-        content = scraps.read_file(filepath)
+    # Fallback: list + fetch + parse client-side
+    completed = []
+    files = [f for f in sorted(scraps.list_files("tasks")) if f.endswith(".md")]
+    contents = scraps.read_files(files)
+
+    for filepath in files:
+        content = contents.get(filepath)
         if not content:
             continue
 
         task = parse_task_file(filepath, content)
         if task.status == "completed":
-            completed.append((filepath, content))
+            completed.append(filepath)
 
     return completed
 
@@ -123,33 +123,33 @@ def get_documented_tasks(scraps: ScrapsClient) -> set[str]:
 
 def get_source_files(scraps: ScrapsClient) -> dict[str, str]:
     """Get all source files from src/ directory."""
-    sources = {}
-    files = scraps.list_files("src")
-
+    return scraps.read_files(scraps.list_files("src"))
+
+
+def count_tasks_by_status(scraps: ScrapsClient) -> dict[str, int]:
+    """Count tasks per status, without downloading bodies when possible."""
+    counts = {"pending": 0, "in_progress": 0, "completed": 0}
+    for status in counts:
+        meta = scraps.list_tasks_by_status(status)
+        if meta is None:
+            break
+        counts[status] = len(meta)
+    else:
+        return counts
+
+    # Fallback: one batched fetch + parse, shared across all three counts
+    files = [f for f in scraps.list_files("tasks") if f.endswith(".md")]
+    contents = scraps.read_files(files)
     for filepath in files:
-        content = scraps.read_file(filepath)
+        content = contents.get(filepath)
         if content:
-            sources[filepath] = content
+            status = parse_task_file(filepath, content).status
+            if status in counts:
+                counts[status] += 1
+    return counts
 
-    return sources
 
-
-def document_task(scraps: ScrapsClient, task_path: str, task_content: str,
-                  source_files: dict[str, str], documented: set[str]) -> bool:
-    """Generate documentation for a completed task. Returns True if successful."""
-    task = parse_task_file(task_path, task_content)
-    pending_files: dict[str, str] = {}
-
-    print(f"\nDocumenting: {task.title}")
-    print("-" * 40)
-
-    # Build source context
-    source_context = ""
-    for path, content in source_files.items():
-        source_context += f"\n### {path}\n```python\n{content}\n```\n"
-
-    # Set up Claude agent
-    system_prompt = """You are a documentation agent. Your job is to create clear, useful documentation for completed tasks.
+SYSTEM_PROMPT = """You are a documentation agent. Your job is to create clear, useful documentation for completed tasks.
 
 Guidelines:
 - Write in clear, concise Markdown
@@ -158,7 +158,30 @@ Guidelines:
 - Note any important design decisions
 - Keep docs focused and practical"""
 
-    agent = ClaudeAgent(system_prompt, TOOLS)
+
+def document_task(scraps: ScrapsClient, task_path: str,
+                  task_content: str, source_files: dict[str, str],
+                  documented: set[str], doc_lock: threading.Lock) -> bool:
+    """Generate documentation for a completed task. Returns True if successful.
+
+    Safe to run concurrently for independent tasks: the shared
+    documented set and the .documented commit are serialized under
+    doc_lock.
+    """
+    task = parse_task_file(task_path, task_content)
+    pending_files: dict[str, str] = {}
+
+    print(f"\nDocumenting: {task.title}")
+    print("-" * 40)
+
+    # Build source context in one pass; += on a growing string is O(N^2)
+    source_context = "".join(
+        f"\n### {path}\n```python\n{content}\n```\n"
+        for path, content in source_files.items()
+    )
+
+    # Own conversation per task; the underlying LLM client is shared
+    agent = ClaudeAgent(SYSTEM_PROMPT, TOOLS)
 
     prompt = f"""Please create documentation for this completed task.
 
@@ -170,22 +193,56 @@ Guidelines:
 
 Create appropriate documentation files in docs/ and call done when finished."""
 
+    debouncer = StreamDebouncer()
+
     while True:
+        # Stream the response so text and tool calls are processed as
+        # they arrive instead of blocking on the full completion.
+        content_parts: list[str] = []
+        content_len = 0
+        tool_calls: dict[str, dict] = {}
+        current_tool_id = None
+        finish_reason = None
+
         try:
-            response = agent.send(prompt)
+            for chunk in agent.stream(prompt):
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+                delta = choice.delta
+
+                if delta.content:
+                    print(delta.content, end="", flush=True)
+                    content_parts.append(delta.content)
+                    content_len += len(delta.content)
+                    if debouncer.should_send(content_len):
+                        scraps.stream_event("agent_progress", chars=content_len)
+                        debouncer.mark_sent(content_len)
+
+                if delta.tool_calls:
+                    for tc in delta.tool_calls:
+                        tc_id = tc.id or current_tool_id
+                        if tc.id:
+                            current_tool_id = tc.id
+                            tool_calls[tc_id] = {"name": "", "arguments": ""}
+                        if tc_id and tc_id in tool_calls and tc.function:
+                            if tc.function.name:
+                                tool_calls[tc_id]["name"] = tc.function.name
+                            if tc.function.arguments:
+                                tool_calls[tc_id]["arguments"] += tc.function.arguments
         except openai.BadRequestError as e:
             check_api_error(e)
         except openai.APIError as e:
             check_api_error(e)
 
+        print()
+        response = StreamedResponse.from_parts("".join(content_parts), tool_calls, finish_reason)
         message = response.choices[0].message
         tool_results = []
         finished = False
 
-        # Print any text content
-        if message.content:
-            print(message.content)
-
         # Process tool calls
         if message.tool_calls:
             for tool_call in message.tool_calls:
@@ -212,16 +269,18 @@ Create appropriate documentation files in docs/ and call done when finished."""
                     print(f"\n  {summary}")
 
                     if pending_files:
-                        # Update documented tracking
-                        new_documented = documented | {task_path}
-                        pending_files["docs/.documented"] = "\n".join(sorted(new_documented))
-
-                        # Commit docs
-                        print(f"  Committing {len(pending_files)} files...")
-                        sha = scraps.commit(
-                            f"Add documentation for: {task.title}",
-                            pending_files
-                        )
+                        # Serialize the .documented update across workers
+                        with doc_lock:
+                            new_documented = documented | {task_path}
+                            pending_files["docs/.documented"] = "\n".join(sorted(new_documented))
+
+                            # Commit docs
+                            print(f"  Committing {len(pending_files)} files...")
+                            sha = scraps.commit(
+                                f"Add documentation for: {task.title}",
+                                pending_files
+                            )
+                            documented.add(task_path)
                         print(f"  Committed: {sha[:8]}")
 
                     tool_results.append({
@@ -243,6 +302,19 @@ Create appropriate documentation files in docs/ and call done when finished."""
             return False
 
 
+def wait_for_completion_event(scraps: ScrapsClient, timeout: float = POLL_INTERVAL):
+    """Block until a NEW task_complete event arrives, or timeout elapses.
+
+    Event-driven wake: a completion right after we checked no longer
+    waits out the full poll interval, while the timeout keeps the
+    max_empty exit behavior intact when nothing is happening.
+    wait_for_activity keeps a tail-seeded cursor across calls, so
+    replayed history can't satisfy the wait and hot-spin this loop
+    into its max_empty exit.
+    """
+    scraps.wait_for_activity(timeout, types=("task_complete",))
+
+
 def main():
     print(f"Documenter {AGENT_ID} starting on {STORE}/{REPO}")
     print("-" * 50)
@@ -250,48 +322,62 @@ def main():
     scraps = ScrapsClient(STORE, REPO, BRANCH, AGENT_ID)
     scraps.stream_event("agent_join", agent_name=AGENT_ID, role="documenter")
 
+    doc_lock = threading.Lock()
     docs_created = 0
     consecutive_empty = 0
     max_empty = 20  # Exit after 20 consecutive polls with no new completed tasks
 
+    # We own every write to docs/.documented, so read it once at startup
+    # and keep the set authoritative in memory (updated on each commit).
+    documented = get_documented_tasks(scraps)
+
     try:
         while True:
             # Get current state
             completed_tasks = get_completed_tasks(scraps)
-            documented = get_documented_tasks(scraps)
             source_files = get_source_files(scraps)
 
             # Find tasks that need documentation
-            needs_docs = [(p, c) for p, c in completed_tasks if p not in documented]
+            needs_docs = [p for p in completed_tasks if p not in documented]
 
             if not needs_docs:
                 consecutive_empty += 1
                 if consecutive_empty >= max_empty:
                     print(f"\nNo new tasks to document for {max_empty} polls, exiting")
                     break
-                pending = len([1 for p, c in get_all_tasks(scraps) if parse_task_file(p, c).status == "pending"])
-                in_progress = len([1 for p, c in get_all_tasks(scraps) if parse_task_file(p, c).status == "in_progress"])
+                counts = count_tasks_by_status(scraps)
+                pending = counts["pending"]
+                in_progress = counts["in_progress"]
 
                 if pending == 0 and in_progress == 0 and len(completed_tasks) > 0:
                     print(f"\nAll tasks completed and documented!")
                     break
 
                 print(f"Waiting for completed tasks... (pending: {pending}, in_progress: {in_progress})")
-                time.sleep(POLL_INTERVAL)
+                wait_for_completion_event(scraps)
                 continue
 
             consecutive_empty = 0
 
-            # Document the first undocumented task
-            task_path, task_content = needs_docs[0]
-            print(f"\nFound undocumented task: {task_path}")
-
-            if document_task(scraps, task_path, task_content, source_files, documented):
-                docs_created += 1
-                documented.add(task_path)
-                print(f"\nDocumented! ({docs_created} total)")
-            else:
-                print(f"\nDocumentation failed for {task_path}")
+            # Document up to MAX_PARALLEL_DOCS tasks concurrently; the
+            # jobs are independent and LLM calls are I/O-bound.
+            batch = needs_docs[:MAX_PARALLEL_DOCS]
+            contents = scraps.read_files(batch)
+            print(f"\nFound {len(batch)} undocumented task(s): {batch}")
+
+            with ThreadPoolExecutor(max_workers=MAX_PARALLEL_DOCS) as ex:
+                futures = {
+                    ex.submit(document_task, scraps, p, contents[p],
+                              source_files, documented, doc_lock): p
+                    for p in batch if contents.get(p)
+                }
+                for fut in as_completed(futures):
+                    task_path = futures[fut]
+                    if fut.result():
+                        docs_created += 1
+                        print(f"\nDocumented {task_path}! ({docs_created} total)")
+                    else:
+                        print(f"\nDocumentation failed for {task_path}")
 
     except KeyboardInterrupt:
         print("\nInterrupted")
@@ -303,21 +389,5 @@ def main():
         print(f"\nDocumenter {AGENT_ID} finished. Created {docs_created} documentation files.")
 
 
-def get_all_tasks(scraps: ScrapsClient) -> list[tuple[str, str]]:
-    """Get all task files. Returns list of (path, content)."""
-    tasks = []
-    files = scraps.list_files("tasks")
-
-    for filepath in sorted(files):
-        if not filepath.endswith(".md"):
-            continue
-
-        content = scraps.read_file(filepath)
-        if content:
-            tasks.append((filepath, content))
-
-    return tasks
-
-
 if __name__ == "__main__":
     main()
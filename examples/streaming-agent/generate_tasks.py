@@ -6,70 +6,108 @@ No LLM needed - just creates the task files directly.
 
 import os
 import sys
-
-TASKS = [
-    ("slugify", "Convert string to URL-friendly slug", "Remove special chars, replace spaces with hyphens, lowercase"),
-    ("capitalize", "Capitalize first letter of each word", "Handle edge cases like empty strings"),
-    ("truncate", "Truncate string with ellipsis", "Take string and maxLength, add '...' if truncated"),
-    ("debounce", "Debounce function calls", "Return debounced function that delays execution"),
-    ("throttle", "Throttle function calls", "Return throttled function that limits execution rate"),
-    ("deepClone", "Deep clone an object", "Handle nested objects and arrays, not functions"),
-    ("flatten", "Flatten nested arrays", "Recursively flatten to single level"),
-    ("unique", "Get unique values from array", "Remove duplicates, preserve order"),
-    ("groupBy", "Group array items by key", "Return object with keys and grouped arrays"),
-    ("chunk", "Split array into chunks", "Return array of arrays with specified size"),
-    ("shuffle", "Randomly shuffle array", "Fisher-Yates shuffle algorithm"),
-    ("pick", "Pick specific keys from object", "Return new object with only specified keys"),
-    ("omit", "Omit specific keys from object", "Return new object without specified keys"),
-    ("merge", "Deep merge objects", "Recursively merge, later values override"),
-    ("isEmpty", "Check if value is empty", "Handle null, undefined, empty string/array/object"),
-    ("isEqual", "Deep equality check", "Compare objects and arrays recursively"),
-    ("randomInt", "Generate random integer in range", "Inclusive min and max"),
-    ("sleep", "Promise-based delay", "Return promise that resolves after ms"),
-    ("retry", "Retry async function with backoff", "Configurable attempts and delay"),
-    ("memoize", "Memoize function results", "Cache based on argument values"),
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple
+
+from agent_base import ScrapsClient
+
+# Computed once at import; the script's location never changes
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class Task(NamedTuple):
+    """A pre-baked task definition; attribute access lets CPython's
+    specializing interpreter cache the lookups."""
+    name: str
+    title: str
+    detail: str
+
+
+TASKS: list[Task] = [
+    Task("slugify", "Convert string to URL-friendly slug", "Remove special chars, replace spaces with hyphens, lowercase"),
+    Task("capitalize", "Capitalize first letter of each word", "Handle edge cases like empty strings"),
+    Task("truncate", "Truncate string with ellipsis", "Take string and maxLength, add '...' if truncated"),
+    Task("debounce", "Debounce function calls", "Return debounced function that delays execution"),
+    Task("throttle", "Throttle function calls", "Return throttled function that limits execution rate"),
+    Task("deepClone", "Deep clone an object", "Handle nested objects and arrays, not functions"),
+    Task("flatten", "Flatten nested arrays", "Recursively flatten to single level"),
+    Task("unique", "Get unique values from array", "Remove duplicates, preserve order"),
+    Task("groupBy", "Group array items by key", "Return object with keys and grouped arrays"),
+    Task("chunk", "Split array into chunks", "Return array of arrays with specified size"),
+    Task("shuffle", "Randomly shuffle array", "Fisher-Yates shuffle algorithm"),
+    Task("pick", "Pick specific keys from object", "Return new object with only specified keys"),
+    Task("omit", "Omit specific keys from object", "Return new object without specified keys"),
+    Task("merge", "Deep merge objects", "Recursively merge, later values override"),
+    Task("isEmpty", "Check if value is empty", "Handle null, undefined, empty string/array/object"),
+    Task("isEqual", "Deep equality check", "Compare objects and arrays recursively"),
+    Task("randomInt", "Generate random integer in range", "Inclusive min and max"),
+    Task("sleep", "Promise-based delay", "Return promise that resolves after ms"),
+    Task("retry", "Retry async function with backoff", "Configurable attempts and delay"),
+    Task("memoize", "Memoize function results", "Cache based on argument values"),
 ]
 
+# Filenames are a pure function of the static TASKS table; build the
+# lookup once at import
+_TASK_FILENAMES = [f"tasks/{i:03d}-{t.name}.md" for i, t in enumerate(TASKS, 1)]
+
 
 def generate_task_file(num: int, name: str, title: str, detail: str) -> tuple[str, str]:
-    """Generate task filename and content."""
-    filename = f"tasks/{num:03d}-{name}.md"
-
-    content = f"""---
-status: pending
-claimed_by: null
-priority: 2
-depends_on: []
-owns: [src/utils/{name}.ts]
----
-# Task: Implement {name} utility
-
-## Description
-Create `src/utils/{name}.ts` that exports the `{name}` function.
-
-{title}. {detail}.
-
-## Requirements
-- Export a single function named `{name}`
-- Include TypeScript types
-- Handle edge cases
-- Keep it simple and focused
-
-## Example
-```typescript
-export function {name}(...args): ReturnType {{
-  // implementation
-}}
-```
-
-## Acceptance Criteria
-- [ ] Function works correctly
-- [ ] TypeScript types included
-- [ ] Edge cases handled
-"""
+    """Generate task filename and content.
+
+    Built with str.join over a fixed-length tuple: static lines stay
+    literal and no template is re-parsed per call.
+    """
+    filename = _TASK_FILENAMES[num - 1]
+    content = "\n".join((
+        "---",
+        "status: pending",
+        "claimed_by: null",
+        "priority: 2",
+        "depends_on: []",
+        f"owns: [src/utils/{name}.ts]",
+        "---",
+        f"# Task: Implement {name} utility",
+        "",
+        "## Description",
+        f"Create `src/utils/{name}.ts` that exports the `{name}` function.",
+        "",
+        f"{title}. {detail}.",
+        "",
+        "## Requirements",
+        f"- Export a single function named `{name}`",
+        "- Include TypeScript types",
+        "- Handle edge cases",
+        "- Keep it simple and focused",
+        "",
+        "## Example",
+        "```typescript",
+        f"export function {name}(...args): ReturnType {{",
+        "  // implementation",
+        "}",
+        "```",
+        "",
+        "## Acceptance Criteria",
+        "- [ ] Function works correctly",
+        "- [ ] TypeScript types included",
+        "- [ ] Edge cases handled",
+        "",
+    ))
     return filename, content
 
 
+def _gen_one(numbered: tuple[int, Task]) -> tuple[str, str]:
+    """Map-friendly wrapper: (num, task) -> (filename, content)."""
+    num, t = numbered
+    return generate_task_file(num, t.name, t.title, t.detail)
+
+
+@lru_cache(maxsize=4)
+def _get_client(store: str, repo: str) -> ScrapsClient:
+    """Construct (and memoize) the scraps client for a store/repo pair."""
+    return ScrapsClient(store, repo, "main", "task-generator")
+
+
 def main():
     if len(sys.argv) < 3:
         print(f"Usage: {sys.argv[0]} <store> <repo>")
@@ -78,24 +116,19 @@ def main():
     store = sys.argv[1]
     repo = sys.argv[2]
 
-    # Import scraps client
-    from agent_base import ScrapsClient
+    scraps = _get_client(store, repo)
 
-    scraps = ScrapsClient(store, repo, "main", "task-generator")
-
-    # Generate all task files
-    files = {}
+    # Generate all task files; accumulate as (path, content) pairs and
+    # build the commit dict once at the boundary
+    files: list[tuple[str, str]] = []
 
     # Add PRD
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    with open(os.path.join(script_dir, "prd-parallel.md")) as f:
-        files["prd.md"] = f.read()
-
-    # Generate tasks
-    for i, (name, title, detail) in enumerate(TASKS, 1):
-        filename, content = generate_task_file(i, name, title, detail)
-        files[filename] = content
-        print(f"  + {filename}")
+    files.append(("prd.md", Path(_SCRIPT_DIR, "prd-parallel.md").read_text(encoding="utf-8")))
+
+    # Generate tasks in parallel; each render is independent
+    with ThreadPoolExecutor() as ex:
+        files.extend(ex.map(_gen_one, enumerate(TASKS, 1)))
+    sys.stdout.write("\n".join(f"  + {f}" for f in _TASK_FILENAMES) + "\n")
 
     # Commit all at once
     print(f"\nCommitting {len(files)} files...")
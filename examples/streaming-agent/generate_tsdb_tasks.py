@@ -9,6 +9,16 @@ Creates:
 
 import os
 import sys
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import NamedTuple
+
+from agent_base import ScrapsClient
+
+# Computed once at import; the script's location never changes
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Foundation code - created directly, not as tasks
 FOUNDATION_FILES = {
@@ -273,125 +283,171 @@ pub use streaming::*;
 ''',
 }
 
+# lib.rs also needs the modules created by tasks (database, sample, api);
+# splice them in once at import so the constant is canonical
+FOUNDATION_FILES["src/lib.rs"] = (
+    FOUNDATION_FILES["src/lib.rs"].rstrip()
+    + "\npub mod database;\npub mod sample;\npub mod api;\n"
+)
+
+# Read-only from here on: freeze the mapping and intern the keys so
+# lookups compare pointers and accidental mutation raises
+FOUNDATION_FILES = MappingProxyType(
+    {sys.intern(k): v for k, v in FOUNDATION_FILES.items()}
+)
+
+class TsdbTask(NamedTuple):
+    """A task definition; criteria is a tuple so the whole table is
+    immutable and interned at module load."""
+    slug: str
+    filepath: str
+    title: str
+    description: str
+    criteria: tuple[str, ...]
+
+
 # 20 parallel implementation tasks
-TASKS = [
+TASKS: list[TsdbTask] = [
     # Stream layer (3)
-    ("stream-server", "src/stream/server.rs", "Durable streams HTTP server",
+    TsdbTask("stream-server", "src/stream/server.rs", "Durable streams HTTP server",
      "Implement embedded HTTP server for durable-streams protocol. Handle PUT (create stream), POST (append), GET (read with offset). Store stream data in files. Return Stream-Next-Offset header.",
-     ["HTTP server binds to configured port", "Append returns offset", "Read with offset works", "Live long-poll tailing works"]),
+     ("HTTP server binds to configured port", "Append returns offset", "Read with offset works", "Live long-poll tailing works")),
 
-    ("stream-client", "src/stream/client.rs", "Durable streams consumer",
+    TsdbTask("stream-client", "src/stream/client.rs", "Durable streams consumer",
      "Implement stream consumer that reads from stream with offset tracking. Support resumable reads, live tailing. Parse incoming data points using protocol module.",
-     ["Reads from stream endpoint", "Tracks offset for resume", "Supports live tail mode", "Parses DataPoints"]),
+     ("Reads from stream endpoint", "Tracks offset for resume", "Supports live tail mode", "Parses DataPoints")),
 
-    ("stream-protocol", "src/stream/protocol.rs", "Stream wire protocol",
+    TsdbTask("stream-protocol", "src/stream/protocol.rs", "Stream wire protocol",
      "Implement newline-delimited JSON protocol for stream data. Encode/decode DataPoint to/from JSON lines. Handle batch encoding for efficiency.",
-     ["Encode DataPoint to JSON line", "Decode JSON line to DataPoint", "Batch encode/decode", "Handle malformed input"]),
+     ("Encode DataPoint to JSON line", "Decode JSON line to DataPoint", "Batch encode/decode", "Handle malformed input")),
 
     # Storage layer (4)
-    ("arrow-codec", "src/storage/arrow_codec.rs", "Arrow encoding/decoding",
+    TsdbTask("arrow-codec", "src/storage/arrow_codec.rs", "Arrow encoding/decoding",
      "Implement Arrow RecordBatch encoding for DataPoints. Schema: timestamp (Int64), series_id (UInt64), value (Float64). Support encode batch and decode batch.",
-     ["Create Arrow schema", "Encode Vec<DataPoint> to RecordBatch", "Decode RecordBatch to Vec<DataPoint>", "Handle empty batches"]),
+     ("Create Arrow schema", "Encode Vec<DataPoint> to RecordBatch", "Decode RecordBatch to Vec<DataPoint>", "Handle empty batches")),
 
-    ("chunk-format", "src/storage/chunk.rs", "Chunk file format",
+    TsdbTask("chunk-format", "src/storage/chunk.rs", "Chunk file format",
      "Implement chunk file format using Arrow IPC. Write RecordBatch to file with metadata footer (time range, row count). Read chunks back with metadata.",
-     ["Write chunk to bytes", "Read chunk from bytes", "Store/retrieve time range", "Store/retrieve row count"]),
+     ("Write chunk to bytes", "Read chunk from bytes", "Store/retrieve time range", "Store/retrieve row count")),
 
-    ("object-store", "src/storage/object.rs", "Object storage backends",
+    TsdbTask("object-store", "src/storage/object.rs", "Object storage backends",
      "Implement ObjectStore trait for local filesystem. Store files in data_dir/chunks/YYYY/MM/DD/HH/ structure. Support put, get, delete, list, exists.",
-     ["LocalStore implements ObjectStore", "Hierarchical path structure", "List with prefix filtering", "Atomic writes"]),
+     ("LocalStore implements ObjectStore", "Hierarchical path structure", "List with prefix filtering", "Atomic writes")),
 
-    ("manifest", "src/storage/manifest.rs", "Chunk manifest/catalog",
+    TsdbTask("manifest", "src/storage/manifest.rs", "Chunk manifest/catalog",
      "Implement manifest that tracks all chunks. Store as JSON file. Support add chunk, remove chunk, query by time range. Thread-safe updates.",
-     ["Load/save manifest JSON", "Add chunk metadata", "Query chunks by time range", "Thread-safe with RwLock"]),
+     ("Load/save manifest JSON", "Add chunk metadata", "Query chunks by time range", "Thread-safe with RwLock")),
 
     # Ingestion layer (3)
-    ("write-buffer", "src/ingest/buffer.rs", "In-memory write buffer",
+    TsdbTask("write-buffer", "src/ingest/buffer.rs", "In-memory write buffer",
      "Implement WriteBuffer trait with thread-safe in-memory buffer. Support push (single point), flush (drain all), len, size_bytes. Use parking_lot Mutex.",
-     ["Thread-safe push", "Atomic flush returns all points", "Accurate size tracking", "Implements WriteBuffer trait"]),
+     ("Thread-safe push", "Atomic flush returns all points", "Accurate size tracking", "Implements WriteBuffer trait")),
 
-    ("flusher", "src/ingest/flusher.rs", "Buffer to chunk flusher",
+    TsdbTask("flusher", "src/ingest/flusher.rs", "Buffer to chunk flusher",
      "Implement flusher that converts buffer contents to Arrow chunks and uploads to object storage. Trigger on size threshold or time interval. Update manifest.",
-     ["Flush buffer to Arrow chunk", "Upload chunk to object store", "Update manifest", "Generate unique chunk IDs"]),
+     ("Flush buffer to Arrow chunk", "Upload chunk to object store", "Update manifest", "Generate unique chunk IDs")),
 
-    ("compactor", "src/ingest/compactor.rs", "Chunk compaction",
+    TsdbTask("compactor", "src/ingest/compactor.rs", "Chunk compaction",
      "Implement background compactor that merges small chunks into larger ones. Scan for chunks in same time window, merge if total size below threshold, update manifest.",
-     ["Find chunks to compact", "Merge multiple chunks", "Delete old chunks after merge", "Update manifest atomically"]),
+     ("Find chunks to compact", "Merge multiple chunks", "Delete old chunks after merge", "Update manifest atomically")),
 
     # Query layer (5)
-    ("sql-parser", "src/query/parser.rs", "SQL query parser",
+    TsdbTask("sql-parser", "src/query/parser.rs", "SQL query parser",
      "Parse SQL queries using sqlparser crate. Support SELECT with time BETWEEN, WHERE filters, GROUP BY time_bucket(), aggregates (SUM, AVG, COUNT, MIN, MAX). Return AST.",
-     ["Parse SELECT statements", "Extract time range predicates", "Parse time_bucket() calls", "Parse aggregate functions"]),
+     ("Parse SELECT statements", "Extract time range predicates", "Parse time_bucket() calls", "Parse aggregate functions")),
 
-    ("query-planner", "src/query/planner.rs", "Query planner",
+    TsdbTask("query-planner", "src/query/planner.rs", "Query planner",
      "Convert parsed SQL AST to execution plan. Prune chunks by time range using manifest. Push down simple predicates. Create operator tree.",
-     ["Prune chunks by time range", "Create scan operators for relevant chunks", "Push down filters", "Build operator tree"]),
+     ("Prune chunks by time range", "Create scan operators for relevant chunks", "Push down filters", "Build operator tree")),
 
-    ("scan-operator", "src/query/scan.rs", "Scan operator",
+    TsdbTask("scan-operator", "src/query/scan.rs", "Scan operator",
      "Implement scan operator that reads chunks from object storage. Decode Arrow data, apply filters, yield DataPoints. Implement Operator trait.",
-     ["Read chunk from object store", "Decode Arrow to DataPoints", "Apply filter predicates", "Implement Operator::next()"]),
+     ("Read chunk from object store", "Decode Arrow to DataPoints", "Apply filter predicates", "Implement Operator::next()")),
 
-    ("aggregate-operator", "src/query/aggregate.rs", "Aggregation operators",
+    TsdbTask("aggregate-operator", "src/query/aggregate.rs", "Aggregation operators",
      "Implement aggregate functions: Sum, Avg, Count, Min, Max. Implement time-bucket grouping. Support streaming aggregation (incremental updates).",
-     ["Sum, Avg, Count, Min, Max functions", "Time bucket grouping", "Implement AggregateFunc trait", "Streaming/incremental updates"]),
+     ("Sum, Avg, Count, Min, Max functions", "Time bucket grouping", "Implement AggregateFunc trait", "Streaming/incremental updates")),
 
-    ("streaming-query", "src/query/streaming.rs", "Streaming query executor",
+    TsdbTask("streaming-query", "src/query/streaming.rs", "Streaming query executor",
      "Implement continuous query executor for SUBSCRIBE queries. Tail stream for new data, apply query operators, emit results as they arrive.",
-     ["Subscribe to stream", "Apply query operators to new data", "Emit incremental results", "Handle backpressure"]),
+     ("Subscribe to stream", "Apply query operators to new data", "Emit incremental results", "Handle backpressure")),
 
     # CLI & integration (3)
-    ("cli-main", "src/bin/streamdb.rs", "CLI entry point",
+    TsdbTask("cli-main", "src/bin/streamdb.rs", "CLI entry point",
      "Implement CLI with subcommands: start (run server), query (execute SQL), ingest (send data), status (show stats). Use std::env::args for parsing.",
-     ["start subcommand", "query subcommand", "ingest subcommand", "status subcommand"]),
+     ("start subcommand", "query subcommand", "ingest subcommand", "status subcommand")),
 
-    ("database", "src/database.rs", "Database coordinator",
+    TsdbTask("database", "src/database.rs", "Database coordinator",
      "Implement Database struct that wires all components together. Start stream server, spawn flusher, provide query interface. Graceful shutdown.",
-     ["Initialize all components", "Start background tasks", "Query execution entry point", "Graceful shutdown"]),
+     ("Initialize all components", "Start background tasks", "Query execution entry point", "Graceful shutdown")),
 
-    ("sample-generator", "src/sample.rs", "Sample data generator",
+    TsdbTask("sample-generator", "src/sample.rs", "Sample data generator",
      "Implement sample metrics generator for demo. Generate cpu_usage, memory_usage, disk_io with random walk values. Configurable rate and duration.",
-     ["Generate realistic metrics", "Multiple metric types", "Configurable rate", "Random walk values"]),
+     ("Generate realistic metrics", "Multiple metric types", "Configurable rate", "Random walk values")),
 
     # Demo (2)
-    ("http-api", "src/api.rs", "HTTP query API",
+    TsdbTask("http-api", "src/api.rs", "HTTP query API",
      "Implement HTTP endpoint for queries. POST /query with SQL body, return JSON results. GET /status for health check. Support streaming responses for SUBSCRIBE.",
-     ["POST /query endpoint", "JSON response format", "GET /status health check", "Streaming response for subscriptions"]),
+     ("POST /query endpoint", "JSON response format", "GET /status health check", "Streaming response for subscriptions")),
 
-    ("demo-example", "examples/demo.rs", "End-to-end demo",
+    TsdbTask("demo-example", "examples/demo.rs", "End-to-end demo",
      "Create runnable demo that starts DB, ingests sample data, runs queries, shows results. Print clear output showing the pipeline working.",
-     ["Start embedded database", "Generate and ingest sample data", "Run example queries", "Print formatted results"]),
+     ("Start embedded database", "Generate and ingest sample data", "Run example queries", "Print formatted results")),
 ]
 
 
-def generate_task_file(num: int, slug: str, filepath: str, title: str, description: str, criteria: list[str]) -> tuple[str, str]:
-    """Generate task filename and content."""
-    filename = f"tasks/{num:03d}-{slug}.md"
-    criteria_md = "\n".join(f"- [ ] {c}" for c in criteria)
-
-    content = f"""---
-status: pending
-claimed_by: null
-priority: 2
-depends_on: []
-owns: [{filepath}]
----
-# Task: {title}
+# TASKS is static, so the criteria markdown and filenames are rendered
+# once at import
+_CRITERIA_MD = ["\n".join(["- [ ] " + c for c in t.criteria]) for t in TASKS]
+_TASK_FILENAMES = [f"tasks/{i:03d}-{t.slug}.md" for i, t in enumerate(TASKS, 1)]
+
+
+def generate_task_file(num: int, slug: str, filepath: str, title: str, description: str, criteria_md: str) -> tuple[str, str]:
+    """Generate task filename and content.
+
+    Built with str.join over a fixed-length tuple: static lines stay
+    literal and no template is re-parsed per call.
+    """
+    filename = _TASK_FILENAMES[num - 1]
+    content = "\n".join((
+        "---",
+        "status: pending",
+        "claimed_by: null",
+        "priority: 2",
+        "depends_on: []",
+        f"owns: [{filepath}]",
+        "---",
+        f"# Task: {title}",
+        "",
+        "## Description",
+        description,
+        "",
+        "## File to Create",
+        f"`{filepath}`",
+        "",
+        "## Acceptance Criteria",
+        criteria_md,
+        "",
+        "## Notes",
+        "- Import types/traits from `crate::*`",
+        "- Use `crate::Result<T>` for error handling",
+        "- Keep implementation focused and minimal",
+        "",
+    ))
+    return filename, content
 
-## Description
-{description}
 
-## File to Create
-`{filepath}`
+def _gen_one(numbered: tuple[int, TsdbTask]) -> tuple[str, str]:
+    """Map-friendly wrapper: (num, task) -> (filename, content)."""
+    num, t = numbered
+    return generate_task_file(num, t.slug, t.filepath, t.title, t.description,
+                              _CRITERIA_MD[num - 1])
 
-## Acceptance Criteria
-{criteria_md}
 
-## Notes
-- Import types/traits from `crate::*`
-- Use `crate::Result<T>` for error handling
-- Keep implementation focused and minimal
-"""
-    return filename, content
+@lru_cache(maxsize=4)
+def _get_client(store: str, repo: str) -> ScrapsClient:
+    """Construct (and memoize) the scraps client for a store/repo pair."""
+    return ScrapsClient(store, repo, "main", "task-generator")
 
 
 def main():
@@ -402,33 +458,25 @@ def main():
     store = sys.argv[1]
     repo = sys.argv[2]
 
-    from agent_base import ScrapsClient
+    scraps = _get_client(store, repo)
 
-    scraps = ScrapsClient(store, repo, "main", "task-generator")
-
-    files = {}
+    # Accumulate as (path, content) pairs; the commit dict is built once
+    files: list[tuple[str, str]] = []
 
     # Add PRD
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    with open(os.path.join(script_dir, "prd-tsdb.md")) as f:
-        files["prd.md"] = f.read()
+    files.append(("prd.md", Path(_SCRIPT_DIR, "prd-tsdb.md").read_text(encoding="utf-8")))
     print("  + prd.md")
 
-    # Add foundation files
+    # Add foundation files; batch the progress lines into one stdout write
     print("\nCreating foundation files...")
-    for path, content in FOUNDATION_FILES.items():
-        files[path] = content
-        print(f"  + {path}")
-
-    # Need to add database.rs and sample.rs and api.rs to lib.rs
-    files["src/lib.rs"] = files["src/lib.rs"].rstrip() + "\npub mod database;\npub mod sample;\npub mod api;\n"
+    files.extend(FOUNDATION_FILES.items())
+    sys.stdout.write("\n".join(f"  + {path}" for path in FOUNDATION_FILES) + "\n")
 
-    # Generate tasks
+    # Generate tasks in parallel; each render is independent
     print(f"\nGenerating {len(TASKS)} parallel tasks...")
-    for i, (slug, filepath, title, desc, criteria) in enumerate(TASKS, 1):
-        filename, content = generate_task_file(i, slug, filepath, title, desc, criteria)
-        files[filename] = content
-        print(f"  + {filename}")
+    with ThreadPoolExecutor() as ex:
+        files.extend(ex.map(_gen_one, enumerate(TASKS, 1)))
+    sys.stdout.write("\n".join(f"  + {f}" for f in _TASK_FILENAMES) + "\n")
 
     # Commit all at once
     print(f"\nCommitting {len(files)} files...")
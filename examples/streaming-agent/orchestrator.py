@@ -13,23 +13,17 @@ Usage:
 
 import os
 import sys
-import json
+import hashlib
+import pickle
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 import openai
-from agent_base import ScrapsClient, ClaudeAgent
-
-
-class APICreditsError(Exception):
-    """Raised when API credits are exhausted."""
-    pass
-
-
-def check_api_error(e: Exception):
-    """Check if error is due to credit/billing issues and raise appropriate exception."""
-    error_msg = str(e).lower()
-    if "credit" in error_msg or "billing" in error_msg or "quota" in error_msg or "insufficient" in error_msg:
-        raise APICreditsError("API credits exhausted. Please add credits to your OpenRouter account.")
-    raise e
+from agent_base import (
+    ScrapsClient, ClaudeAgent, StreamedResponse, _json_dumps, _json_loads,
+    APICreditsError, check_api_error,
+)
 
 if len(sys.argv) < 3:
     print(f"Usage: {sys.argv[0]} <store> <repo>")
@@ -41,7 +35,9 @@ BRANCH = os.environ.get("BRANCH", "main")
 AGENT_ID = os.environ.get("AGENT_ID", f"orchestrator-{os.getpid()}")
 PRD_FILE = os.environ.get("PRD_FILE", "prd.md")
 
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Resolved once at import; the read itself raises if the file is
+# missing, so no separate existence stat is needed
+PRD_PATH = Path(__file__).resolve().parent / PRD_FILE
 
 # ---------------------------------------------------------------------------
 # Tools for Claude
@@ -97,6 +93,23 @@ TOOLS = [
             "required": ["task_number", "slug", "title", "description", "acceptance_criteria", "owns"],
         },
     },
+    {
+        "name": "bulk_create_tasks",
+        "description": "Create several task files in one call. Preferred over repeated create_task calls: emit the whole breakdown at once.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "tasks": {
+                    "type": "array",
+                    "description": "Task objects, same shape as create_task input",
+                    # Filled in below from the create_task schema so the
+                    # two tools can never drift apart.
+                    "items": None,
+                },
+            },
+            "required": ["tasks"],
+        },
+    },
     {
         "name": "done",
         "description": "Finish creating tasks and commit all files to the repo.",
@@ -113,65 +126,13 @@ TOOLS = [
     },
 ]
 
+TOOLS[1]["input_schema"]["properties"]["tasks"]["items"] = TOOLS[0]["input_schema"]
 
-def create_task_content(inputs: dict) -> str:
-    """Generate markdown content for a task file."""
-    priority = inputs.get("priority", 3)
-    depends = inputs.get("depends_on", [])
-    depends_str = ", ".join(depends) if depends else ""
-    owns = inputs.get("owns", [])
-    owns_str = ", ".join(owns) if owns else ""
-
-    criteria_lines = "\n".join(f"- [ ] {c}" for c in inputs["acceptance_criteria"])
-    owns_lines = "\n".join(f"- `{f}`" for f in owns) if owns else "- (none specified)"
-
-    return f"""---
-status: pending
-claimed_by: null
-priority: {priority}
-depends_on: [{depends_str}]
-owns: [{owns_str}]
----
-# Task: {inputs['title']}
-
-## Description
-{inputs['description']}
-
-## Owned Files
-{owns_lines}
-
-## Acceptance Criteria
-{criteria_lines}
-"""
-
-
-def main():
-    print(f"Orchestrator {AGENT_ID} working on {STORE}/{REPO}")
-    print("-" * 50)
-
-    # Read local PRD file
-    prd_path = os.path.join(SCRIPT_DIR, PRD_FILE)
-    if not os.path.exists(prd_path):
-        print(f"Error: PRD file not found: {prd_path}")
-        sys.exit(1)
-
-    with open(prd_path) as f:
-        prd_content = f.read()
-
-    print(f"Read PRD from {PRD_FILE} ({len(prd_content)} chars)")
-
-    # Initialize clients
-    scraps = ScrapsClient(STORE, REPO, BRANCH, AGENT_ID)
-    scraps.stream_event("agent_join", agent_name=AGENT_ID, role="orchestrator")
 
-    # Files to commit
-    pending_files: dict[str, str] = {}
-
-    # Add PRD to pending files
-    pending_files["prd.md"] = prd_content
-
-    # Set up Claude agent
-    system_prompt = """You are an orchestrator agent that breaks down a PRD into ATOMIC tasks for a multi-agent swarm.
+# Built once at import and reused across loop iterations; ClaudeAgent
+# marks it with cache_control so providers that support prompt caching
+# reuse the KV cache for this prefix on every turn.
+SYSTEM_PROMPT = """You are an orchestrator agent that breaks down a PRD into ATOMIC tasks for a multi-agent swarm.
 
 ATOMIC TASKS ARE KEY:
 - Each task should own exactly ONE file
@@ -182,7 +143,7 @@ Your job is to:
 1. Analyze the PRD carefully
 2. Break it into ATOMIC tasks (one file per task)
 3. Set up dependencies to maximize parallel execution
-4. Create tasks using create_task tool
+4. Emit all tasks in ONE bulk_create_tasks call
 5. Call done when finished
 
 FILE OWNERSHIP:
@@ -220,7 +181,141 @@ Task priorities:
 - 3: Implementation
 - 4: Assembly/integration"""
 
-    agent = ClaudeAgent(system_prompt, TOOLS)
+
+# The frontmatter opener never varies; only the trailer is formatted
+# per task.
+_FIXED_PREFIX = "---\nstatus: pending\nclaimed_by: null\n"
+_TASK_TEMPLATE = (
+    "priority: {priority}\n"
+    "depends_on: [{depends}]\n"
+    "owns: [{owns}]\n"
+    "---\n# Task: {title}\n\n"
+    "## Description\n{description}\n\n"
+    "## Owned Files\n{owns_lines}\n\n"
+    "## Acceptance Criteria\n{criteria}\n"
+)
+
+
+def create_task_content(inputs: dict) -> str:
+    """Generate markdown content for a task file."""
+    owns = inputs.get("owns", [])
+    return "".join((_FIXED_PREFIX, _TASK_TEMPLATE.format_map({
+        "priority": inputs.get("priority", 3),
+        "depends": ", ".join(map(str, inputs.get("depends_on", []))),
+        "owns": ", ".join(owns),
+        "title": inputs["title"],
+        "description": inputs["description"],
+        "owns_lines": "\n".join(f"- `{f}`" for f in owns) if owns else "- (none specified)",
+        "criteria": "\n".join(f"- [ ] {c}" for c in inputs["acceptance_criteria"]),
+    })))
+
+
+# Disk-backed response cache: repeated orchestrator runs over an
+# unchanged PRD replay the conversation from disk instead of paying
+# for the same LLM turns again. Set ORCHESTRATOR_NOCACHE=1 to bypass.
+_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", os.path.expanduser("~/.cache"))) / "scraps-orchestrator"
+
+
+def _stream_response(agent, prompt: str) -> StreamedResponse:
+    """Stream one turn and assemble it into a StreamedResponse.
+
+    Text is printed as it arrives and tool-call argument fragments
+    accumulate per call id, so the network wait overlaps the local
+    build instead of blocking on the full completion.
+    """
+    content_parts: list[str] = []
+    tool_calls: dict[str, dict] = {}
+    current_tool_id = None
+    finish_reason = None
+
+    for chunk in agent.stream(prompt):
+        if not chunk.choices:
+            continue
+        choice = chunk.choices[0]
+        if choice.finish_reason:
+            finish_reason = choice.finish_reason
+        delta = choice.delta
+
+        if delta.content:
+            print(delta.content, end="", flush=True)
+            content_parts.append(delta.content)
+
+        if delta.tool_calls:
+            for tc in delta.tool_calls:
+                tc_id = tc.id or current_tool_id
+                if tc.id:
+                    current_tool_id = tc.id
+                    tool_calls[tc_id] = {"name": "", "arguments": ""}
+                if tc_id and tc_id in tool_calls and tc.function:
+                    if tc.function.name:
+                        tool_calls[tc_id]["name"] = tc.function.name
+                    if tc.function.arguments:
+                        tool_calls[tc_id]["arguments"] += tc.function.arguments
+
+    print()
+    return StreamedResponse.from_parts("".join(content_parts), tool_calls, finish_reason)
+
+
+def _cached_send(agent, prompt: str):
+    """Streamed send with an exact-match disk cache.
+
+    The key covers the model, the full conversation so far, and the
+    outgoing prompt, so any change to the PRD or to earlier turns is
+    a miss. Writes are published atomically via rename.
+    """
+    if os.environ.get("ORCHESTRATOR_NOCACHE"):
+        return _stream_response(agent, prompt)
+
+    key = hashlib.blake2b(
+        repr((agent.model, agent.messages, prompt)).encode(), digest_size=16
+    ).hexdigest()
+    path = _CACHE_DIR / f"{key}.pkl"
+    try:
+        response = pickle.loads(path.read_bytes())
+    except (OSError, pickle.PickleError):
+        pass
+    else:
+        # Mirror the state change agent.send would have made
+        agent.messages.append({"role": "user", "content": prompt})
+        return response
+
+    response = _stream_response(agent, prompt)
+    try:
+        _CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(pickle.dumps(response))
+        tmp.replace(path)
+    except (OSError, pickle.PickleError):
+        pass
+    return response
+
+
+def main():
+    print(f"Orchestrator {AGENT_ID} working on {STORE}/{REPO}")
+    print("-" * 50)
+
+    # Read local PRD file
+    try:
+        prd_content = PRD_PATH.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        print(f"Error: PRD file not found: {PRD_PATH}")
+        sys.exit(1)
+
+    print(f"Read PRD from {PRD_FILE} ({len(prd_content)} chars)")
+
+    # Initialize clients
+    scraps = ScrapsClient(STORE, REPO, BRANCH, AGENT_ID)
+    scraps.stream_event("agent_join", agent_name=AGENT_ID, role="orchestrator")
+
+    # Files to commit, as (path, content) pairs handed straight to
+    # commit() without building an intermediate dict
+    pending_files: list[tuple[str, str]] = []
+
+    # Add PRD to pending files
+    pending_files.append(("prd.md", prd_content))
+
+    # Set up Claude agent
+    agent = ClaudeAgent(SYSTEM_PROMPT, TOOLS)
 
     print("\nAnalyzing PRD and creating tasks...")
 
@@ -230,9 +325,19 @@ Task priorities:
         print(f"\n{e}")
         scraps.stream_event("error", error="api_credits_exhausted")
         scraps.stream_event("agent_leave", role="orchestrator")
+        # Events are queued to a background sender; drain before exiting
+        scraps.flush_events()
         sys.exit(1)
 
 
+def _add_task(args: dict, pending_files: list[tuple[str, str]]) -> str:
+    """Render one task from tool args into pending_files; returns its path."""
+    filename = f"tasks/{args['task_number']:03d}-{args['slug']}.md"
+    pending_files.append((filename, create_task_content(args)))
+    print(f"  + Created {filename}: {args['title']}")
+    return filename
+
+
 def _run_orchestrator_loop(agent, scraps, pending_files, prd_content):
     """Inner loop for orchestrator."""
     prompt = f"""Please analyze this Product Requirements Document and break it into implementable tasks.
@@ -244,11 +349,15 @@ and set appropriate dependencies.
 {prd_content}
 ---
 
-Use create_task for each task, then call done when finished."""
+Emit every task in a single bulk_create_tasks call, then call done when finished."""
+
+    commit_thread = None
+    commit_result: dict = {}
+    task_count = 0  # running count; avoids rescanning pending_files on done
 
     while True:
         try:
-            response = agent.send(prompt)
+            response = _cached_send(agent, prompt)
         except openai.BadRequestError as e:
             check_api_error(e)
         except openai.APIError as e:
@@ -258,50 +367,71 @@ Use create_task for each task, then call done when finished."""
         tool_results = []
         finished = False
 
-        # Print any text content
-        if message.content:
-            print(message.content)
-
-        # Process tool calls
+        # Process tool calls (text was already printed as it streamed)
         if message.tool_calls:
             for tool_call in message.tool_calls:
                 name = tool_call.function.name
                 try:
-                    args = json.loads(tool_call.function.arguments)
-                except json.JSONDecodeError:
+                    args = _json_loads(tool_call.function.arguments)
+                except ValueError:
                     args = {}
 
                 if name == "create_task":
-                    task_num = args["task_number"]
-                    slug = args["slug"]
-                    filename = f"tasks/{task_num:03d}-{slug}.md"
+                    filename = _add_task(args, pending_files)
+                    task_count += 1
 
-                    content = create_task_content(args)
-                    pending_files[filename] = content
+                    tool_results.append({
+                        "tool_use_id": tool_call.id,
+                        "content": _json_dumps({"ok": True, "path": filename}).decode(),
+                    })
 
-                    print(f"  + Created {filename}: {args['title']}")
+                elif name == "bulk_create_tasks":
+                    tasks = args.get("tasks", [])
+                    if len(tasks) >= 8:
+                        # Rendering is independent per task; only spin
+                        # up threads when the batch is big enough to
+                        # beat the pool-startup cost
+                        with ThreadPoolExecutor(max_workers=4) as ex:
+                            contents = list(ex.map(create_task_content, tasks))
+                        paths = []
+                        for t, content in zip(tasks, contents):
+                            filename = f"tasks/{t['task_number']:03d}-{t['slug']}.md"
+                            pending_files.append((filename, content))
+                            print(f"  + Created {filename}: {t['title']}")
+                            paths.append(filename)
+                    else:
+                        paths = [_add_task(t, pending_files) for t in tasks]
+                    task_count += len(paths)
 
                     tool_results.append({
                         "tool_use_id": tool_call.id,
-                        "content": json.dumps({"ok": True, "path": filename}),
+                        "content": _json_dumps({"ok": True, "paths": paths}).decode(),
                     })
 
                 elif name == "done":
                     print(f"\n{args.get('summary', 'Tasks created')}")
 
-                    # Commit all files
+                    # Start the commit in the background so the final
+                    # bookkeeping (tool results, history, leave event)
+                    # overlaps the network round trip; joined below.
                     if pending_files:
                         print(f"\nCommitting {len(pending_files)} files...")
-                        task_count = len([f for f in pending_files if f.startswith("tasks/")])
-                        sha = scraps.commit(
-                            f"Add PRD and {task_count} tasks for implementation",
-                            pending_files
-                        )
-                        print(f"Committed: {sha[:8]}")
+
+                        def _commit(task_count=task_count):
+                            try:
+                                commit_result["sha"] = scraps.commit(
+                                    f"Add PRD and {task_count} tasks for implementation",
+                                    pending_files
+                                )
+                            except Exception as exc:
+                                commit_result["error"] = exc
+
+                        commit_thread = threading.Thread(target=_commit)
+                        commit_thread.start()
 
                     tool_results.append({
                         "tool_use_id": tool_call.id,
-                        "content": json.dumps({"ok": True, "finished": True}),
+                        "content": _json_dumps({"ok": True, "finished": True}).decode(),
                     })
                     finished = True
 
@@ -309,6 +439,11 @@ Use create_task for each task, then call done when finished."""
 
         if finished:
             scraps.stream_event("agent_leave", role="orchestrator")
+            if commit_thread is not None:
+                commit_thread.join()
+                if "error" in commit_result:
+                    raise commit_result["error"]
+                print(f"Committed: {commit_result['sha'][:8]}")
             print("\nOrchestrator done!")
             return
 
@@ -15,25 +15,16 @@ Environment:
 """
 
 import os
+import re
 import sys
 import json
 import time
+import hashlib
+from typing import Optional
 
 import openai
-from agent_base import ScrapsClient, ClaudeAgent, parse_task_file
-
-
-class APICreditsError(Exception):
-    """Raised when API credits are exhausted."""
-    pass
-
-
-def check_api_error(e: Exception):
-    """Check if error is due to credit/billing issues and raise appropriate exception."""
-    error_msg = str(e).lower()
-    if "credit" in error_msg or "billing" in error_msg or "quota" in error_msg or "insufficient" in error_msg:
-        raise APICreditsError("API credits exhausted. Please add credits to your OpenRouter account.")
-    raise e
+from agent_base import (ScrapsClient, ClaudeAgent, APICreditsError, check_api_error,
+                        estimate_tokens, parse_task_file)
 
 
 if len(sys.argv) < 3:
@@ -46,6 +37,23 @@ BRANCH = os.environ.get("BRANCH", "main")
 AGENT_ID = os.environ.get("AGENT_ID", f"reviewer-{os.getpid()}")
 
 POLL_INTERVAL = 5.0
+MAX_REVIEW_BATCH = 8  # max completed tasks reviewed in one Claude call
+
+# Optional cheap model for summarizing context files (e.g. a local
+# Ollama endpoint: SUMMARIZER_BASE_URL=http://localhost:11434/v1).
+# Unset means context files are embedded verbatim.
+SUMMARIZER_BASE_URL = os.environ.get("SUMMARIZER_BASE_URL")
+SUMMARIZER_MODEL = os.environ.get("SUMMARIZER_MODEL", "qwen2.5-coder:1.5b")
+
+# Estimated input-token ceiling for a review prompt; context blocks are
+# pruned to fit (largest first) before the request goes out.
+MAX_INPUT_TOKENS = int(os.environ.get("MAX_INPUT_TOKENS", "150000"))
+
+# A verdict is just a tool call with a short summary, so cap the output
+# per reviewed task; the thinking budget (0 = provider default) bounds
+# extended-thinking tokens on models that support it.
+REVIEW_MAX_TOKENS = int(os.environ.get("REVIEW_MAX_TOKENS", "400"))
+REVIEW_THINKING_BUDGET = int(os.environ.get("REVIEW_THINKING_BUDGET", "0"))
 
 # ---------------------------------------------------------------------------
 # Tools for Claude
@@ -58,12 +66,16 @@ TOOLS = [
         "input_schema": {
             "type": "object",
             "properties": {
+                "task_index": {
+                    "type": "integer",
+                    "description": "1-based index of the task this verdict applies to",
+                },
                 "summary": {
                     "type": "string",
                     "description": "Brief summary of what was implemented correctly",
                 },
             },
-            "required": ["summary"],
+            "required": ["task_index", "summary"],
         },
     },
     {
@@ -72,6 +84,10 @@ TOOLS = [
         "input_schema": {
             "type": "object",
             "properties": {
+                "task_index": {
+                    "type": "integer",
+                    "description": "1-based index of the task this verdict applies to",
+                },
                 "issues": {
                     "type": "array",
                     "items": {"type": "string"},
@@ -83,7 +99,7 @@ TOOLS = [
                     "description": "Which files need to be modified",
                 },
             },
-            "required": ["issues", "files_affected"],
+            "required": ["task_index", "issues", "files_affected"],
         },
     },
 ]
@@ -92,16 +108,13 @@ TOOLS = [
 def get_completed_tasks(scraps: ScrapsClient) -> list[tuple[str, str]]:
     """Get all completed task files that haven't been reviewed yet."""
     completed = []
-    files = scraps.list_files("tasks")
+    # One bulk tree+blobs fetch; fix tasks are filtered out locally
+    contents = scraps.read_tree("tasks")
 
-    for filepath in sorted(files):
-        if not filepath.endswith(".md"):
-            continue
-        # Skip fix tasks
-        if "-fix-" in filepath:
+    for filepath in sorted(contents):
+        if not filepath.endswith(".md") or "-fix-" in filepath:
             continue
-
-        content = scraps.read_file(filepath)
+        content = contents[filepath]
         if not content:
             continue
 
@@ -112,6 +125,19 @@ def get_completed_tasks(scraps: ScrapsClient) -> list[tuple[str, str]]:
     return completed
 
 
+def _open_fix_task_numbers(scraps: ScrapsClient) -> set[str]:
+    """Task numbers that already have an unfinished tasks/NNN-fix-* file."""
+    nums: set[str] = set()
+    contents = scraps.read_tree("tasks")
+    for filepath, content in contents.items():
+        if "-fix-" not in filepath or not filepath.endswith(".md") or not content:
+            continue
+        task = parse_task_file(filepath, content)
+        if task.status != "completed":
+            nums.add(task.get_task_number())
+    return nums
+
+
 def get_reviewed_tasks(scraps: ScrapsClient) -> set[str]:
     """Get set of task paths that have already been reviewed."""
     reviewed = set()
@@ -126,40 +152,11 @@ def get_reviewed_tasks(scraps: ScrapsClient) -> set[str]:
 
 
 def get_source_files(scraps: ScrapsClient) -> dict[str, str]:
-    """Get all source files from src/ directory."""
-    sources = {}
-    files = scraps.list_files("src")
-
-    for filepath in files:
-        content = scraps.read_file(filepath)
-        if content:
-            sources[filepath] = content
-
-    return sources
-
-
-def review_task(scraps: ScrapsClient, task_path: str, task_content: str,
-                source_files: dict[str, str], reviewed: set[str]) -> str:
-    """Review a completed task. Returns 'approved' or 'fix_requested'."""
-    task = parse_task_file(task_path, task_content)
+    """Get all source files from src/ directory (one bulk fetch)."""
+    return scraps.read_tree("src")
 
-    print(f"\nReviewing: {task.title}")
-    print("-" * 40)
-
-    # Build source context - only files owned by this task
-    owned_sources = ""
-    for path in task.owns:
-        if path in source_files:
-            owned_sources += f"\n### {path}\n```\n{source_files[path]}\n```\n"
-
-    # Also include related files for context
-    other_sources = ""
-    for path, content in source_files.items():
-        if path not in task.owns:
-            other_sources += f"\n### {path} (context)\n```\n{content}\n```\n"
 
-    # Set up Claude agent
-    system_prompt = """You are a code reviewer for a multi-agent project.
+SYSTEM_PROMPT = """You are a code reviewer for a multi-agent project.
 
 Your job is to review completed task implementations and either:
 1. APPROVE if the code meets all acceptance criteria
@@ -176,20 +173,269 @@ Only request fixes for real issues:
 - Obvious bugs that would prevent the code from working
 - Critical missing imports or syntax errors"""
 
-    agent = ClaudeAgent(system_prompt, TOOLS)
 
-    prompt = f"""Please review this completed task implementation.
+def _review_cache_key(task, source_files: dict[str, str]) -> str:
+    """Content hash of everything the reviewer would see for one task."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(SYSTEM_PROMPT.encode())
+    h.update(task.body.encode())
+    h.update(",".join(task.owns).encode())
+    for path in sorted(source_files):
+        h.update(path.encode())
+        h.update(source_files[path].encode())
+    return h.hexdigest()
+
+
+def review_tasks(scraps: ScrapsClient, batch: list[tuple[str, str]],
+                 source_files: dict[str, str], reviewed: set[str]) -> dict[str, str]:
+    """Review up to MAX_REVIEW_BATCH completed tasks in a single Claude call.
 
-## Task
+    Bundling the pending reviews into one prompt pays the per-request
+    overhead and context prefill once instead of once per task. A
+    verdict for an identical (task, source tree) input is replayed from
+    reviews/.cache/ without an API call. Returns
+    {task_path: 'approved' | 'fix_requested'}.
+    """
+    tasks = [parse_task_file(p, c) for p, c in batch]
+
+    print(f"\nReviewing {len(tasks)} task(s): " + ", ".join(t.title for t in tasks))
+    print("-" * 40)
+
+    # Default to approved in memory only, matching the single-task
+    # reviewer's behavior when the model returns no verdict for a task.
+    # Durable state (reviews/.reviewed) is written solely for explicit
+    # approvals below -- a clipped batch response must not permanently
+    # mark its unverdicted tasks as reviewed.
+    results = {path: "approved" for path, _ in batch}
+    explicit_approvals: set[str] = set()
+    cache_keys: dict[str, str] = {}
+    cache_writes: dict[str, str] = {}
+    fix_files: dict[str, str] = {}
+
+    # A fix-requested task stays in needs_review until its fix lands,
+    # so without this guard every loop iteration would file a fresh
+    # duplicate fix task (instantly, on the cached-verdict path).
+    open_fix_nums = _open_fix_task_numbers(scraps)
+
+    # Replay cache: skip the API call for inputs we've already judged
+    # (e.g. after a restart before .reviewed was updated).
+    uncached: list[tuple[str, object]] = []
+    for (path, _), task in zip(batch, tasks):
+        key = _review_cache_key(task, source_files)
+        cache_keys[path] = key
+        cached = scraps.read_file(f"reviews/.cache/{key}.json")
+        entry = None
+        if cached:
+            try:
+                entry = json.loads(cached)
+            except json.JSONDecodeError:
+                pass
+        if entry and entry.get("result") in ("approved", "fix_requested"):
+            print(f"  (cached verdict) {entry['result']}: {task.title}")
+            results[path] = entry["result"]
+            if entry["result"] == "approved":
+                explicit_approvals.add(path)
+            if entry["result"] == "fix_requested":
+                num = task.get_task_number()
+                if num in open_fix_nums:
+                    print(f"  (fix task already open for {task.title})")
+                else:
+                    fix_path, fix_content = build_fix_task(
+                        task, entry.get("issues", []), entry.get("files_affected", []))
+                    fix_files[fix_path] = fix_content
+                    open_fix_nums.add(num)
+        else:
+            uncached.append((path, task))
+
+    if uncached:
+        _review_with_claude(scraps, uncached, source_files, results,
+                            cache_keys, cache_writes, fix_files, open_fix_nums,
+                            explicit_approvals)
+
+    # One commit per reviewer turn: the tracking update, new cache
+    # entries and any fix tasks all land together instead of one git
+    # write (and ref-update race) apiece.
+    approved_set = {p for p in explicit_approvals if results[p] == "approved"}
+    files_to_commit = {**cache_writes, **fix_files}
+    if approved_set:
+        files_to_commit["reviews/.reviewed"] = "\n".join(sorted(reviewed | approved_set))
+    if files_to_commit:
+        msg_parts = []
+        approved_titles = [t.title for t, (p, _) in zip(tasks, batch) if p in approved_set]
+        fixed_titles = [t.title for t, (p, _) in zip(tasks, batch) if results[p] == "fix_requested"]
+        if approved_titles:
+            msg_parts.append("approve " + ", ".join(approved_titles))
+        if fixed_titles:
+            msg_parts.append("request fixes for " + ", ".join(fixed_titles))
+        scraps.commit("Review: " + "; ".join(msg_parts or ["update cache"]), files_to_commit)
+
+    return results
+
+
+# Import-ish statements across the languages the workers emit
+# (Python, TS/JS, Rust); used to prune unreferenced context files.
+_IMPORT_RE = re.compile(
+    r"""^\s*(?:
+        from\s+([\w.]+)\s+import                          # python
+        | import\s+[^'"\n]*['"]([^'"\n]+)['"]             # ts/js import ... from '...'
+        | import\s+([\w.]+)                               # python / ts side-effect
+        | (?:const|let|var)\s+\w+\s*=\s*require\(['"]([^'"\n]+)['"]\)
+        | use\s+([\w:]+)                                  # rust
+    )""",
+    re.MULTILINE | re.VERBOSE,
+)
+
+
+def _referenced_stems(owned_contents: list[str]) -> set[str]:
+    """Module-name segments the owned files import from."""
+    stems: set[str] = set()
+    for content in owned_contents:
+        for m in _IMPORT_RE.finditer(content):
+            token = next((g for g in m.groups() if g), "")
+            stems.update(re.split(r"[./:]+", token))
+    stems.discard("")
+    return stems
+
+
+_summarizer_client = None
+
+
+def _summarize_file(scraps: ScrapsClient, path: str, content: str,
+                    cache_writes: dict[str, str]) -> Optional[str]:
+    """One-paragraph summary of a context file via the cheap model.
+
+    Returns None when no summarizer is configured or the call fails, in
+    which case the caller embeds the file verbatim. Summaries are cached
+    at reviews/.cache/summary/<sha>.txt keyed on content, so a file is
+    only re-summarized when it changes; new summaries ride along in the
+    per-turn commit via cache_writes.
+    """
+    global _summarizer_client
+    if not SUMMARIZER_BASE_URL:
+        return None
+
+    sha = hashlib.blake2b(content.encode(), digest_size=16).hexdigest()
+    cache_path = f"reviews/.cache/summary/{sha}.txt"
+    cached = cache_writes.get(cache_path) or scraps.read_file(cache_path)
+    if cached:
+        return cached
+
+    if _summarizer_client is None:
+        _summarizer_client = openai.OpenAI(
+            base_url=SUMMARIZER_BASE_URL,
+            api_key=os.environ.get("SUMMARIZER_API_KEY", "ollama"),
+        )
+    try:
+        resp = _summarizer_client.chat.completions.create(
+            model=SUMMARIZER_MODEL,
+            max_tokens=200,
+            messages=[
+                # Stable prompt so the summarizer's own cache can hit too
+                {"role": "system", "content": "Summarize the given source file in one "
+                                              "short paragraph: its purpose, what it "
+                                              "exports, and notable dependencies."},
+                {"role": "user", "content": f"{path}:\n```\n{content}\n```"},
+            ],
+        )
+        summary = (resp.choices[0].message.content or "").strip()
+    except openai.OpenAIError:
+        return None
+
+    if summary:
+        cache_writes[cache_path] = summary
+        return summary
+    return None
+
+
+def _review_with_claude(scraps: ScrapsClient, uncached: list[tuple[str, object]],
+                        source_files: dict[str, str], results: dict[str, str],
+                        cache_keys: dict[str, str], cache_writes: dict[str, str],
+                        fix_files: dict[str, str], open_fix_nums: set[str],
+                        explicit_approvals: set[str]):
+    """Send the uncached tasks to Claude and dispatch the verdicts."""
+    owned_by_batch = {path for _, task in uncached for path in task.owns}
+
+    # Shared context: files not owned by any task in the batch (sorted
+    # so the block is byte-stable across reviews and prompt caching can
+    # hit on it). Only embed files the owned code actually references
+    # (or tiny ones); the rest get a one-line index entry so the model
+    # still knows they exist without the prompt carrying their bodies.
+    owned_contents = [source_files[p] for _, task in uncached
+                      for p in task.owns if p in source_files]
+    referenced = _referenced_stems(owned_contents)
+
+    context_parts: list[tuple[str, str]] = []  # (path, rendered block)
+    index_lines = []
+    for path, content in sorted(source_files.items()):
+        if path in owned_by_batch:
+            continue
+        stem = os.path.basename(path).split(".")[0]
+        if stem in referenced or len(content) < 500:
+            summary = _summarize_file(scraps, path, content, cache_writes)
+            if summary is not None:
+                context_parts.append((path, f"\n### {path} (summary)\n{summary}\n"))
+            else:
+                context_parts.append((path, f"\n### {path} (context)\n```\n{content}\n```\n"))
+        else:
+            sha = hashlib.blake2b(content.encode(), digest_size=4).hexdigest()
+            index_lines.append(f"- {path} (sha={sha}, {len(content)} bytes)")
+
+    # Per-task sections, numbered so tool calls can reference them
+    task_blocks = ""
+    for i, (_, task) in enumerate(uncached, 1):
+        owned_sources = ""
+        for path in task.owns:
+            if path in source_files:
+                owned_sources += f"\n### {path}\n```\n{source_files[path]}\n```\n"
+        task_blocks += f"""
+## Task {i}: {task.title}
 {task.body}
 
-## Files Owned by This Task
+### Files Owned by Task {i}
 {owned_sources if owned_sources else "(No files found)"}
+"""
+
+    agent = ClaudeAgent(SYSTEM_PROMPT, TOOLS,
+                        max_tokens=REVIEW_MAX_TOKENS * len(uncached),
+                        reasoning_budget=REVIEW_THINKING_BUDGET or None)
+
+    # Stable prefix (shared context) first, per-task tail last, with a
+    # cache breakpoint after the prefix so subsequent reviews in the
+    # same window reuse the cached prefill.
+    tail_block = f"""{task_blocks}
+Review each task against its acceptance criteria. For EVERY task, call
+approve or request_fix exactly once, passing its task_index."""
+
+    # Pre-flight budget check: drop the largest context blocks until the
+    # estimated prompt fits, rather than blowing the window mid-request.
+    budget = (MAX_INPUT_TOKENS - estimate_tokens(SYSTEM_PROMPT)
+              - estimate_tokens(tail_block))
+    removed = 0
+    while context_parts and sum(estimate_tokens(b) for _, b in context_parts) > budget:
+        path, block = max(context_parts, key=lambda pb: len(pb[1]))
+        context_parts.remove((path, block))
+        index_lines.append(f"- {path} (omitted to fit context budget)")
+        removed += 1
+    if removed:
+        final_tokens = (MAX_INPUT_TOKENS - budget
+                        + sum(estimate_tokens(b) for _, b in context_parts))
+        print(f"  (pruned {removed} context file(s) to fit {MAX_INPUT_TOKENS} tokens)")
+        scraps.stream_event("context_pruned", removed=removed, final_tokens=final_tokens)
+
+    other_sources = "".join(b for _, b in context_parts)
+    if index_lines:
+        other_sources += ("\nFiles present but not embedded above "
+                          "(contents omitted):\n" + "\n".join(index_lines) + "\n")
+
+    context_block = f"""Please review these completed task implementations.
 
 ## Other Source Files (for context)
-{other_sources if other_sources else "(No other files)"}
+{other_sources if other_sources else "(No other files)"}"""
 
-Review against the acceptance criteria and either approve or request fixes."""
+    prompt = [
+        {"type": "text", "text": context_block, "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": tail_block},
+    ]
 
     try:
         response = agent.send(prompt)
@@ -198,8 +444,19 @@ Review against the acceptance criteria and either approve or request fixes."""
     except openai.APIError as e:
         check_api_error(e)
 
+    # Surface cache effectiveness so the savings are observable.
+    usage = getattr(response, "usage", None)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", None)
+    if cached_tokens:
+        print(f"  (prompt cache hit: {cached_tokens} tokens)")
+    completion_details = getattr(usage, "completion_tokens_details", None)
+    reasoning_tokens = getattr(completion_details, "reasoning_tokens", None)
+    if reasoning_tokens:
+        print(f"  (thinking: {reasoning_tokens} of "
+              f"{getattr(usage, 'completion_tokens', '?')} output tokens)")
+
     message = response.choices[0].message
-    result = "approved"  # Default to approved
 
     if message.content:
         print(message.content)
@@ -212,35 +469,51 @@ Review against the acceptance criteria and either approve or request fixes."""
             except json.JSONDecodeError:
                 args = {}
 
-            if name == "approve":
-                print(f"\n  ✓ APPROVED: {args.get('summary', 'Looks good')}")
-                result = "approved"
+            idx = args.get("task_index")
+            if not isinstance(idx, int) or not 1 <= idx <= len(uncached):
+                # Guessing a task here could overwrite another task's
+                # verdict; leave it for the next review cycle instead.
+                print(f"\n  ! Dropping {name} verdict with bad task_index={idx!r}")
+                continue
+            task_path, task = uncached[idx - 1]
 
-                # Update tracking
-                new_reviewed = reviewed | {task_path}
-                scraps.commit(
-                    f"Review approved: {task.title}",
-                    {"reviews/.reviewed": "\n".join(sorted(new_reviewed))}
-                )
+            if name == "approve":
+                print(f"\n  ✓ APPROVED [{task.title}]: {args.get('summary', 'Looks good')}")
+                results[task_path] = "approved"
+                explicit_approvals.add(task_path)
+                cache_writes[f"reviews/.cache/{cache_keys[task_path]}.json"] = json.dumps(
+                    {"result": "approved", "summary": args.get("summary", "")})
 
             elif name == "request_fix":
                 issues = args.get("issues", [])
                 files_affected = args.get("files_affected", [])
 
-                print(f"\n  ✗ FIX REQUESTED:")
+                print(f"\n  ✗ FIX REQUESTED [{task.title}]:")
                 for issue in issues:
                     print(f"    - {issue}")
 
-                result = "fix_requested"
+                results[task_path] = "fix_requested"
+                cache_writes[f"reviews/.cache/{cache_keys[task_path]}.json"] = json.dumps(
+                    {"result": "fix_requested", "issues": issues,
+                     "files_affected": files_affected})
 
-                # Create a fix task
-                create_fix_task(scraps, task, issues, files_affected)
+                # Create a fix task (committed with the rest of the
+                # turn), unless one is already open for this task.
+                num = task.get_task_number()
+                if num in open_fix_nums:
+                    print(f"  (fix task already open for {task.title})")
+                else:
+                    fix_path, fix_content = build_fix_task(task, issues, files_affected)
+                    fix_files[fix_path] = fix_content
+                    open_fix_nums.add(num)
 
-    return result
 
+def build_fix_task(original_task, issues: list[str], files_affected: list[str]) -> tuple[str, str]:
+    """Build a fix task file for the original task. Returns (path, content).
 
-def create_fix_task(scraps: ScrapsClient, original_task, issues: list[str], files_affected: list[str]):
-    """Create a fix task for the original task."""
+    The caller folds it into the per-turn commit rather than paying a
+    separate git write per fix.
+    """
     task_num = original_task.get_task_number()
     fix_filename = f"tasks/{task_num}-fix-{int(time.time())}.md"
 
@@ -270,8 +543,8 @@ Fix issues found during code review of the original task.
 - [ ] Code still meets original acceptance criteria
 """
 
-    scraps.commit(f"Create fix task for: {original_task.title}", {fix_filename: content})
     print(f"  Created fix task: {fix_filename}")
+    return fix_filename, content
 
 
 def main():
@@ -311,22 +584,21 @@ def main():
                     break
 
                 print(f"Waiting for tasks to review... (pending: {pending}, in_progress: {in_progress})")
-                time.sleep(POLL_INTERVAL)
+                # Wake on task_complete instead of sleeping out the interval.
+                scraps.wait_for_activity(POLL_INTERVAL)
                 continue
 
             consecutive_empty = 0
 
-            # Review the first unreviewed task
-            task_path, task_content = needs_review[0]
-            print(f"\nFound task to review: {task_path}")
-
-            result = review_task(scraps, task_path, task_content, source_files, reviewed)
-            reviews_done += 1
+            # Review the unreviewed tasks, batched into one Claude call
+            batch = needs_review[:MAX_REVIEW_BATCH]
+            print(f"\nFound {len(batch)} task(s) to review")
 
-            if result == "fix_requested":
-                fixes_requested += 1
+            results = review_tasks(scraps, batch, source_files, reviewed)
+            reviews_done += len(batch)
+            fixes_requested += sum(1 for r in results.values() if r == "fix_requested")
 
-            reviewed.add(task_path)
+            reviewed.update(p for p, _ in batch)
             print(f"\nReview complete! ({reviews_done} reviewed, {fixes_requested} fixes requested)")
 
     except KeyboardInterrupt:
@@ -337,6 +609,7 @@ def main():
     finally:
         scraps.stream_event("agent_leave", role="reviewer",
                            reviews_done=reviews_done, fixes_requested=fixes_requested)
+        scraps.flush_events()
         print(f"\nReviewer {AGENT_ID} finished. {reviews_done} reviews, {fixes_requested} fixes requested.")
 
 
@@ -20,22 +20,14 @@ import os
 import sys
 import json
 import time
+import random
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 
 import openai
-from agent_base import ScrapsClient, ClaudeAgent, StreamDebouncer, parse_task_file
-
-
-class APICreditsError(Exception):
-    """Raised when API credits are exhausted."""
-    pass
-
-
-def check_api_error(e: Exception):
-    """Check if error is due to credit/billing issues and raise appropriate exception."""
-    error_msg = str(e).lower()
-    if "credit" in error_msg or "billing" in error_msg or "quota" in error_msg or "insufficient" in error_msg:
-        raise APICreditsError("API credits exhausted. Please add credits to your OpenRouter account.")
-    raise e
+from agent_base import (ScrapsClient, ClaudeAgent, StreamDebouncer, StreamedResponse,
+                        ToolArgStreamer, APICreditsError, check_api_error,
+                        estimate_tokens, parse_task_file)
 
 if len(sys.argv) < 3:
     print(f"Usage: {sys.argv[0]} <store> <repo>")
@@ -50,6 +42,43 @@ MAX_TASKS = int(os.environ.get("MAX_TASKS", "0"))  # 0 = unlimited
 POLL_INTERVAL = 2.0  # seconds between polling for tasks
 MAX_WAIT_FOR_TASKS = 120  # seconds to wait for tasks before giving up
 
+# Estimated input-token ceiling for the implementation prompt; existing-
+# code context is pruned to fit (largest files first).
+MAX_INPUT_TOKENS = int(os.environ.get("MAX_INPUT_TOKENS", "150000"))
+
+
+class _StreamPrinter:
+    """Buffered stdout writer for streamed tokens.
+
+    print(..., flush=True) per delta costs a write syscall per token —
+    thousands per long generation. Let stdout's own buffer absorb the
+    writes and flush only on newline or every 50ms, which looks the
+    same on a terminal.
+    """
+
+    def __init__(self, interval: float = 0.05):
+        self._interval = interval
+        self._last_flush = 0.0
+
+    def write(self, text: str):
+        sys.stdout.write(text)
+        now = time.monotonic()
+        if "\n" in text or now - self._last_flush >= self._interval:
+            sys.stdout.flush()
+            self._last_flush = now
+
+    def flush(self):
+        sys.stdout.flush()
+        self._last_flush = time.monotonic()
+
+
+_out = _StreamPrinter()
+
+# Tool-result payloads for the hot handlers, pre-assembled so a
+# write-heavy turn doesn't pay dict allocation + encoder setup per call.
+_OK_PREFIX = '{"ok":true,"path":'
+_ERR_NOT_FOUND = '{"error":"File not found"}'
+
 # ---------------------------------------------------------------------------
 # Tools for Claude
 # ---------------------------------------------------------------------------
@@ -103,64 +132,91 @@ TOOLS = [
     },
 ]
 
+# Task-agnostic, so one agent (and its warm connection pool + cached
+# system-prompt block) is shared across tasks; per-task details travel
+# in the user prompt.
+SYSTEM_PROMPT = """You are a coding agent. You MUST use the tools provided.
 
-def find_pending_task(scraps: ScrapsClient) -> tuple[str, str] | None:
-    """Find a pending task that can be claimed and has dependencies met. Returns (path, content) or None."""
-    files = scraps.list_files("tasks")
+CRITICAL: DO NOT output code as text. ALWAYS use the write_file tool.
 
-    # First, get all tasks to check dependency status
-    all_tasks = {}
-    for filepath in sorted(files):
-        if not filepath.endswith(".md"):
-            continue
-        content = scraps.read_file(filepath)
-        if content:
-            task = parse_task_file(filepath, content)
-            task_num = task.get_task_number()
-            if task_num:
-                all_tasks[task_num] = task
-
-    # Find a task that is pending, unclaimed, and has all dependencies completed
-    for filepath in sorted(files):
-        if not filepath.endswith(".md"):
-            continue
+Your tools:
+- write_file(path, content) - Write a file. YOU MUST USE THIS.
+- read_file(path) - Read a file
+- done(commit_message) - Finish the task. YOU MUST CALL THIS WHEN DONE.
+
+Process:
+1. Read existing files if any exist (using read_file)
+2. Write your code using write_file (REQUIRED - do not just output code)
+3. Call done with a commit message (REQUIRED)
+
+WRONG: Outputting code as markdown text
+RIGHT: Calling write_file("src/types.ts", "export interface Task {...}")
 
-        content = scraps.read_file(filepath)
+You own specific files - only write to those. Import from existing files."""
+
+
+# Fingerprint of the tasks tree from the last poll that found nothing
+# claimable; an unchanged tree can't suddenly yield a candidate, so the
+# scan is skipped. Only negative results are cached — a hit leads to a
+# claim that changes the tree anyway.
+_empty_scan_key: int | None = None
+
+
+def find_pending_task(scraps: ScrapsClient) -> tuple[str, str] | None:
+    """Find a pending task that can be claimed and has dependencies met. Returns (path, content) or None."""
+    global _empty_scan_key
+    # One bulk tree+blobs fetch; the single pass below works off it
+    # instead of issuing per-file reads.
+    contents = scraps.read_tree("tasks")
+    scan_key = hash(frozenset((path, hash(content))
+                              for path, content in contents.items()))
+    if scan_key == _empty_scan_key:
+        return None
+    files = [f for f in sorted(contents) if f.endswith(".md")]
+
+    # Single pass: parse each task once, recording completed task numbers
+    # and the candidates in filename order.
+    completed_nums: set[str] = set()
+    candidates: list[tuple[str, str, object]] = []
+    for filepath in files:
+        content = contents.get(filepath)
         if not content:
             continue
-
         task = parse_task_file(filepath, content)
-
-        # Skip completed tasks
         if task.status == "completed":
+            completed_nums.add(task.get_task_number())
             continue
+        candidates.append((filepath, content, task))
+
+    # Honor the frontmatter priority (lower = more urgent, so fix tasks
+    # at priority 1 jump the queue), breaking ties by filename.
+    candidates.sort(key=lambda item: (item[2].priority, item[0]))
 
+    # Find a task that is pending, unclaimed, and has all dependencies
+    # completed -- a set-subset check instead of per-dep index lookups.
+    for filepath, content, task in candidates:
         # Skip if already claimed by someone else (but allow in_progress unclaimed - stuck tasks)
         if task.status == "pending" and task.claimed_by:
             continue
 
-        # Check if all dependencies are completed
-        deps_met = True
-        for dep_num in task.depends_on:
-            dep_task = all_tasks.get(dep_num)
-            if not dep_task or dep_task.status != "completed":
-                deps_met = False
-                break
-
-        if not deps_met:
-            continue  # Skip this task, try next one
+        if not completed_nums.issuperset(task.depends_on):
+            continue  # Dependencies not met, try next one
 
+        _empty_scan_key = None
         return filepath, content
 
+    _empty_scan_key = scan_key
     return None
 
 
-def claim_task(scraps: ScrapsClient, task_path: str, task_content: str) -> tuple[bool, list[str]]:
-    """Try to claim a task and its owned files. Returns (success, claimed_patterns)."""
-    task = parse_task_file(task_path, task_content)
+def claim_task(scraps: ScrapsClient, task) -> tuple[bool, list[str]]:
+    """Try to claim a task and its owned files. Returns (success, claimed_patterns).
 
+    Takes the already-parsed TaskFile (mutating its status/claimed_by
+    for the claim commit) so the caller's parse isn't repeated.
+    """
     # Build list of patterns to claim: task file + owned files
-    patterns_to_claim = [task_path] + task.owns
+    patterns_to_claim = [task.path] + task.owns
     print(f"    Claiming: {patterns_to_claim}")
 
     # Try to claim all patterns
@@ -176,7 +232,7 @@ def claim_task(scraps: ScrapsClient, task_path: str, task_content: str) -> tuple
     try:
         scraps.commit(
             f"Claim task: {task.title}",
-            {task_path: updated_content}
+            {task.path: updated_content}
         )
         return True, patterns_to_claim
     except Exception as e:
@@ -198,53 +254,41 @@ def complete_task(scraps: ScrapsClient, task_path: str, task_content: str,
     # Commit everything
     sha = scraps.commit(commit_message, pending_files)
 
-    # Release all claimed patterns (task + owned files)
-    scraps.release(claimed_patterns)
+    # Announce completion so agents waiting on this task wake immediately
+    scraps.stream_event("task_complete", task=task.get_task_number(), path=task_path)
+
+    # Release all claimed patterns (task + owned files). The commit
+    # already landed the completed status, so the release round trip
+    # can overlap with finding the next task.
+    scraps.release_async(claimed_patterns)
 
     return sha
 
 
-def implement_task(scraps: ScrapsClient, task_path: str, task_content: str,
+def implement_task(scraps: ScrapsClient, agent, task, task_content: str,
                    claimed_patterns: list[str]) -> bool:
-    """Use Claude to implement a task. Returns True if successful."""
-    task = parse_task_file(task_path, task_content)
+    """Use Claude to implement a task (already parsed). Returns True if successful."""
+    task_path = task.path
     pending_files: dict[str, str] = {}
-    debouncer = StreamDebouncer()
+    # file_chunk events are advisory previews and now carry only the
+    # newly appended slice, so the thresholds can be finer than when
+    # every event re-sent the whole file; require both gates so the
+    # event rate stays bounded on fast streams.
+    debouncer = StreamDebouncer(min_interval=0.05, min_chars=256, require_both=True)
 
     print(f"\nImplementing: {task.title}")
     print(f"  Owned files: {task.owns}")
     print("-" * 40)
 
-    # Read existing files for context (files created by dependencies)
-    existing_files = {}
-    all_src_files = scraps.list_files("src")
-    for filepath in all_src_files:
-        content = scraps.read_file(filepath)
-        if content:
-            existing_files[filepath] = content
-            print(f"  Found existing: {filepath}")
-
-    # Set up Claude agent
-    system_prompt = """You are a coding agent. You MUST use the tools provided.
-
-CRITICAL: DO NOT output code as text. ALWAYS use the write_file tool.
-
-Your tools:
-- write_file(path, content) - Write a file. YOU MUST USE THIS.
-- read_file(path) - Read a file
-- done(commit_message) - Finish the task. YOU MUST CALL THIS WHEN DONE.
-
-Process:
-1. Read existing files if any exist (using read_file)
-2. Write your code using write_file (REQUIRED - do not just output code)
-3. Call done with a commit message (REQUIRED)
-
-WRONG: Outputting code as markdown text
-RIGHT: Calling write_file("src/types.ts", "export interface Task {...}")
-
-You own specific files - only write to those. Import from existing files."""
+    # Read existing files for context (files created by dependencies),
+    # fetched in one bulk call instead of a GET per file
+    existing_files = scraps.read_tree("src")
+    for filepath in existing_files:
+        print(f"  Found existing: {filepath}")
 
-    agent = ClaudeAgent(system_prompt, TOOLS)
+    # Fresh conversation on the shared agent; the client connection
+    # pool and cached system prompt carry over between tasks.
+    agent.reset()
 
     try:
         return _implement_task_loop(agent, scraps, task, task_path, task_content,
@@ -260,13 +304,23 @@ def _implement_task_loop(agent, scraps, task, task_path, task_content, pending_f
                          debouncer, claimed_patterns, existing_files):
     """Inner loop for task implementation."""
 
-    # Build context from existing files
+    # Build context from existing files, dropping the largest ones first
+    # if the estimated prompt would blow the input budget
     existing_context = ""
     if existing_files:
+        parts = {path: f"### {path}\n```python\n{content}\n```\n\n"
+                 for path, content in existing_files.items()}
+        budget = MAX_INPUT_TOKENS - estimate_tokens(task.body)
+        removed = 0
+        while parts and sum(estimate_tokens(b) for b in parts.values()) > budget:
+            del parts[max(parts, key=lambda p: len(parts[p]))]
+            removed += 1
+        if removed:
+            print(f"  (pruned {removed} context file(s) to fit {MAX_INPUT_TOKENS} tokens)")
+            scraps.stream_event("context_pruned", removed=removed)
         existing_context = "\n\n## Existing Code (from previous tasks)\n"
         existing_context += "Read these to understand what's already built. Import from them as needed.\n\n"
-        for path, content in existing_files.items():
-            existing_context += f"### {path}\n```python\n{content}\n```\n\n"
+        existing_context += "".join(parts.values())
 
     # Build owned files list
     owned_files_str = "\n".join(f"- {f}" for f in task.owns) if task.owns else "- (none specified)"
@@ -285,10 +339,94 @@ IMPORTANT:
 - Read and import from existing files as needed
 - Call done when finished"""
 
+    streamers: dict[str, ToolArgStreamer] = {}  # id -> incremental arg parser
+    chunk_offsets: dict[str, int] = {}  # id -> chars already sent as deltas
+    prefetched: dict[str, str] = {}  # per-turn batched read_file results
+    finished = False
+
+    def _handle_write_file(tc_id: str, args: dict) -> str:
+        path = args.get("path", "")
+        content = args.get("content", "")
+        if path:
+            pending_files[path] = content
+            # Flush the tail delta so chunk subscribers see the
+            # complete file before the terminal write event.
+            streamer = streamers.get(tc_id)
+            sent = chunk_offsets.get(tc_id, 0)
+            if streamer is None:
+                # No deltas went out for this call; send the whole
+                # content as one chunk so subscribers aren't left
+                # with just a checksum.
+                scraps.stream_event(
+                    "file_chunk",
+                    path=path,
+                    offset=0,
+                    delta=content,
+                    version=len(content),
+                )
+            elif streamer.content_len > sent:
+                scraps.stream_event(
+                    "file_chunk",
+                    path=path,
+                    offset=sent,
+                    delta=streamer.content[sent:],
+                    version=streamer.content_len,
+                )
+                chunk_offsets[tc_id] = streamer.content_len
+            # The deltas above already carried the full content; the
+            # terminal event only needs size + checksum so subscribers
+            # can verify their reassembly. Keeping the file_write type
+            # preserves the CLI watcher's "wrote <path>" rendering.
+            scraps.stream_event(
+                "file_write",
+                path=path,
+                size=len(content),
+                sha256=hashlib.sha256(content.encode()).hexdigest(),
+            )
+            print(f"\n  + {path} ({len(content)} chars)")
+
+        # The streamer's buffer duplicates the content now held in
+        # pending_files (the raw arguments string must stay for the
+        # assistant-history replay below); drop it so a multi-file turn
+        # doesn't hold an extra copy of every file until end of turn.
+        streamers.pop(tc_id, None)
+
+        return _OK_PREFIX + json.dumps(path) + "}"
+
+    def _handle_read_file(tc_id: str, args: dict) -> str:
+        path = args.get("path", "")
+        content = prefetched.get(path)
+        if content:
+            print(f"  < Read {path}")
+            return content
+        return _ERR_NOT_FOUND
+
+    def _handle_done(tc_id: str, args: dict) -> str:
+        nonlocal finished
+        commit_msg = args.get("commit_message", "Implementation complete")
+        print(f"\n  Committing: {commit_msg}")
+
+        sha = complete_task(scraps, task_path, task_content, pending_files,
+                            commit_msg, claimed_patterns)
+        print(f"  Committed: {sha[:8]}")
+
+        finished = True
+        return json.dumps({"ok": True, "commit": sha, "finished": True})
+
+    tool_handlers = {
+        "write_file": _handle_write_file,
+        "read_file": _handle_read_file,
+        "done": _handle_done,
+    }
+
     while True:
-        # Stream the response
-        content_text = ""
-        tool_calls = {}  # id -> {name, arguments}
+        # Stream the response. Text and argument deltas accumulate in
+        # lists joined after the stream: str += only stays O(n) when
+        # CPython's refcount fast-path fires, and these buffers get big.
+        content_parts: list[str] = []
+        tool_calls = {}  # id -> {name, arguments (list during stream, str after)}
+        streamers.clear()
+        chunk_offsets.clear()
         current_tool_id = None
 
         stream = agent.stream(prompt)
@@ -300,8 +438,8 @@ IMPORTANT:
 
             # Handle text content
             if delta.content:
-                print(delta.content, end="", flush=True)
-                content_text += delta.content
+                _out.write(delta.content)
+                content_parts.append(delta.content)
 
             # Handle tool calls
             if delta.tool_calls:
@@ -309,116 +447,97 @@ IMPORTANT:
                     tc_id = tc.id or current_tool_id
                     if tc.id:
                         current_tool_id = tc.id
-                        tool_calls[tc_id] = {"name": "", "arguments": ""}
-
-                    if tc_id and tc_id in tool_calls:
-                        if tc.function:
-                            if tc.function.name:
-                                tool_calls[tc_id]["name"] = tc.function.name
-                                if tc.function.name != "write_file":
-                                    print(f"\n-> {tc.function.name}(", end="", flush=True)
-                            if tc.function.arguments:
-                                tool_calls[tc_id]["arguments"] += tc.function.arguments
-
-                                # Stream file content as it's generated
-                                if tool_calls[tc_id]["name"] == "write_file":
-                                    try:
-                                        partial = json.loads(tool_calls[tc_id]["arguments"] + '"}')
-                                        if "content" in partial:
-                                            current_path = partial.get("path", "")
-                                            current_content = partial["content"]
-                                            if current_path and debouncer.should_send(len(current_content)):
-                                                scraps.stream_event(
-                                                    "file_chunk",
-                                                    path=current_path,
-                                                    content=current_content,
-                                                    version=len(current_content),
-                                                )
-                                                debouncer.mark_sent(len(current_content))
-                                                print(f"\r  Writing {current_path}: {len(current_content)} chars", end="", flush=True)
-                                    except json.JSONDecodeError:
-                                        pass
-
-        # Process completed tool calls
-        tool_results = []
-        finished = False
-
+                        tool_calls[tc_id] = {"name": "", "arguments": []}
+
+                    # One lookup per delta; everything below mutates
+                    # through the local reference.
+                    entry = tool_calls.get(tc_id) if tc_id else None
+                    if entry is not None:
+                        fn = tc.function
+                        if fn:
+                            if fn.name:
+                                entry["name"] = fn.name
+                                if fn.name != "write_file":
+                                    print(f"\n-> {fn.name}(", end="", flush=True)
+                            if fn.arguments:
+                                entry["arguments"].append(fn.arguments)
+
+                                # Stream file content as it's generated:
+                                # each delta advances the incremental
+                                # extractor (O(n) total) instead of
+                                # re-parsing the whole buffer.
+                                if entry["name"] == "write_file":
+                                    streamer = streamers.get(tc_id)
+                                    if streamer is None:
+                                        streamer = streamers[tc_id] = ToolArgStreamer()
+                                        # Catch up on anything buffered
+                                        # before the name was known
+                                        streamer.feed("".join(entry["arguments"]))
+                                        # New stream: reset the size gate so a
+                                        # second file in the same turn isn't
+                                        # measured against the first one's length.
+                                        debouncer.last_send_length = 0
+                                    else:
+                                        streamer.feed(fn.arguments)
+
+                                    if (streamer.path
+                                            and debouncer.should_send(streamer.content_len)):
+                                        # Send only the newly appended slice;
+                                        # the watcher keys off path/version and
+                                        # subscribers reassemble by offset.
+                                        sent = chunk_offsets.get(tc_id, 0)
+                                        scraps.stream_event(
+                                            "file_chunk",
+                                            path=streamer.path,
+                                            offset=sent,
+                                            delta=streamer.content[sent:],
+                                            version=streamer.content_len,
+                                        )
+                                        chunk_offsets[tc_id] = streamer.content_len
+                                        debouncer.mark_sent(streamer.content_len)
+                                        print(f"\r  Writing {streamer.path}: {streamer.content_len} chars", end="", flush=True)
+
+        # Make sure buffered tokens land before tool-result prints.
+        _out.flush()
+
+        # Materialize the accumulated deltas; everything downstream
+        # (dispatch and the assistant-history replay) expects strings.
+        content_text = "".join(content_parts)
+        for entry in tool_calls.values():
+            entry["arguments"] = "".join(entry["arguments"])
+
+        # Process completed tool calls: parse arguments once, batch all
+        # of this turn's read_file lookups into a single request, then
+        # dispatch through the handler table.
+        parsed: list[tuple[str, str, dict]] = []
+        read_paths: list[str] = []
         for tc_id, tc_data in tool_calls.items():
-            name = tc_data["name"]
             try:
                 args = json.loads(tc_data["arguments"]) if tc_data["arguments"] else {}
             except json.JSONDecodeError:
                 args = {}
+            parsed.append((tc_id, tc_data["name"], args))
+            if tc_data["name"] == "read_file" and args.get("path"):
+                read_paths.append(args["path"])
 
-            if name == "write_file":
-                path = args.get("path", "")
-                content = args.get("content", "")
-                if path:
-                    pending_files[path] = content
-                    scraps.stream_event("file_write", path=path, content=content)
-                    print(f"\n  + {path} ({len(content)} chars)")
-
-                tool_results.append({
-                    "tool_use_id": tc_id,
-                    "content": json.dumps({"ok": True, "path": path}),
-                })
-
-            elif name == "read_file":
-                path = args.get("path", "")
-                content = scraps.read_file(path)
-                if content:
-                    print(f"  < Read {path}")
-                    tool_results.append({
-                        "tool_use_id": tc_id,
-                        "content": content,
-                    })
-                else:
-                    tool_results.append({
-                        "tool_use_id": tc_id,
-                        "content": json.dumps({"error": "File not found"}),
-                    })
-
-            elif name == "done":
-                commit_msg = args.get("commit_message", "Implementation complete")
-                print(f"\n  Committing: {commit_msg}")
+        prefetched.clear()
+        if read_paths:
+            prefetched.update(scraps.read_files(read_paths))
 
-                sha = complete_task(scraps, task_path, task_content, pending_files,
-                                    commit_msg, claimed_patterns)
-                print(f"  Committed: {sha[:8]}")
-
-                tool_results.append({
-                    "tool_use_id": tc_id,
-                    "content": json.dumps({"ok": True, "commit": sha, "finished": True}),
-                })
-                finished = True
+        tool_results = []
+        finished = False
 
-            else:
+        for tc_id, name, args in parsed:
+            handler = tool_handlers.get(name)
+            if handler is None:
                 print(f")", flush=True)
+                continue
+            tool_results.append({
+                "tool_use_id": tc_id,
+                "content": handler(tc_id, args),
+            })
 
-        # Build response object for add_assistant_response
-        class FakeResponse:
-            class FakeChoice:
-                class FakeMessage:
-                    def __init__(self, content, tool_calls_list):
-                        self.content = content
-                        self.tool_calls = tool_calls_list
-                def __init__(self, content, tool_calls_list):
-                    self.message = self.FakeMessage(content, tool_calls_list)
-            def __init__(self, content, tool_calls_dict):
-                tc_list = []
-                for tc_id, tc_data in tool_calls_dict.items():
-                    class FakeTC:
-                        def __init__(self, id, name, args):
-                            self.id = id
-                            class FakeFunc:
-                                def __init__(self, n, a):
-                                    self.name = n
-                                    self.arguments = a
-                            self.function = FakeFunc(name, args)
-                    tc_list.append(FakeTC(tc_id, tc_data["name"], tc_data["arguments"]))
-                self.choices = [self.FakeChoice(content, tc_list)]
-
-        agent.add_assistant_response(FakeResponse(content_text, tool_calls))
+        agent.add_assistant_response(StreamedResponse.from_parts(content_text, tool_calls))
 
         if finished:
             return True
@@ -438,8 +557,17 @@ def main():
     scraps = ScrapsClient(STORE, REPO, BRANCH, AGENT_ID)
     scraps.stream_event("agent_join", agent_name=AGENT_ID, role="worker")
 
+    # One agent for the worker's lifetime; implement_task resets its
+    # conversation per task instead of rebuilding client + pool.
+    agent = ClaudeAgent(SYSTEM_PROMPT, TOOLS)
+
     tasks_completed = 0
     start_time = time.time()
+    # Single-thread pool used to overlap next-task discovery with the
+    # tail of the current task (commit, release, bookkeeping).
+    prefetch = ThreadPoolExecutor(max_workers=1)
+    next_fut = None
+    claim_backoff = 0.1  # grows on contention, resets on a won claim
 
     try:
         while True:
@@ -448,8 +576,13 @@ def main():
                 print(f"\nCompleted {tasks_completed} tasks, exiting")
                 break
 
-            # Find a pending task (with deps satisfied)
-            result = find_pending_task(scraps)
+            # Find a pending task (with deps satisfied), using the
+            # prefetched result when one is in flight
+            if next_fut is not None:
+                result = next_fut.result()
+                next_fut = None
+            else:
+                result = find_pending_task(scraps)
 
             if result is None:
                 elapsed = time.time() - start_time
@@ -488,7 +621,10 @@ def main():
                 else:
                     print(f"Waiting for tasks... ({int(elapsed)}s)")
 
-                time.sleep(POLL_INTERVAL)
+                # Wake as soon as a dependency completes or a claim is
+                # released instead of sleeping out the full interval.
+                scraps.wait_for_activity(POLL_INTERVAL,
+                                         types=("task_complete", "agent_release"))
                 continue
 
             # Reset timer when we find work
@@ -505,17 +641,25 @@ def main():
 
             # Try to claim it (and its owned files)
             print(f"  Claiming...")
-            success, claimed_patterns = claim_task(scraps, task_path, task_content)
+            success, claimed_patterns = claim_task(scraps, task)
             if not success:
                 print(f"  Failed to claim (another agent got it or file conflict)")
-                time.sleep(1)  # Brief pause before trying again
+                # Jittered exponential backoff: a fixed 1s pause keeps
+                # contending workers in lockstep, colliding on the same
+                # task every cycle.
+                time.sleep(random.uniform(0, claim_backoff))
+                claim_backoff = min(claim_backoff * 2, 5.0)
                 continue
 
+            claim_backoff = 0.1
             print(f"  Claimed {len(claimed_patterns)} patterns!")
 
             # Implement the task
-            if implement_task(scraps, task_path, task_content, claimed_patterns):
+            if implement_task(scraps, agent, task, task_content, claimed_patterns):
                 tasks_completed += 1
+                # Kick off discovery of the next task while we finish
+                # this one's bookkeeping
+                next_fut = prefetch.submit(find_pending_task, scraps)
                 print(f"\nTask completed! ({tasks_completed} total)")
             else:
                 print(f"\nTask implementation failed - resetting task to pending")
@@ -528,7 +672,7 @@ def main():
                 except Exception:
                     pass
                 # Release all claimed patterns on failure
-                scraps.release(claimed_patterns)
+                scraps.release_async(claimed_patterns)
 
     except KeyboardInterrupt:
         print("\nInterrupted")
@@ -536,7 +680,9 @@ def main():
         print(f"\n{e}")
         scraps.stream_event("error", error="api_credits_exhausted")
     finally:
+        prefetch.shutdown(wait=False)
         scraps.stream_event("agent_leave", role="worker", tasks_completed=tasks_completed)
+        scraps.flush_events()
         print(f"\nWorker {AGENT_ID} finished. Completed {tasks_completed} tasks.")
 
 